@@ -0,0 +1,274 @@
+"""分级分析级联
+
+第一级：字符级情感词扫描 + jieba快速分词与词性标注。
+否定词只作用于情感词，因此不含情感词的句子，其情感值只取决于
+词性与句长，可以不经完整解析直接估计。
+第二级：其余句子交给完整的spaCy管线（zh_core_web_lg）处理。
+
+第一级有两种判定方式：
+- 严格模式（margin=None，默认）：对所有可能的词性标注求情感值的上下界，
+  只有上下界落在同一卦象区间内才视为已确定，结果与词性标注无关。
+  在当前词性权重下，下界总是0（震卦），而任何实词都能让上界大于0（坤卦），
+  因此严格模式等价于字符级判断“句子不含任何字母数字”（纯标点等），
+  不需要运行jieba。
+- 近似模式（margin为数值）：jieba估计值±margin落在同一卦象区间内即视为已确定。
+  margin必须先用 calibrate() 在真实模型输出上标定，未经标定的数值不代表“已确定”。
+
+级联使用基于标点的快速分句，而生产环境的 YijingAnalyzer.analyze 使用模型的
+doc.sents 分句，两者切分可能不同；evaluate() 会同时报告这一差异。
+"""
+import argparse
+import re
+import threading
+import time
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import jieba.posseg as pseg
+
+from process_text import AnalysisResult, YijingAnalyzer, split_sentences
+from sentiment_scoring import SENTIMENT_LEXICON, map_to_gua, score_tokens
+
+# jieba（ICTCLAS）词性首字母 -> spaCy通用词性（UPOS），其余词性不计分
+JIEBA_TO_UPOS = {"v": "VERB", "a": "ADJ", "n": "NOUN"}
+_ZERO_TAG = "X"
+
+# calibrate() 默认尝试的容差
+DEFAULT_MARGINS = (0.02, 0.05, 0.1, 0.15, 0.2)
+
+FAST, FULL = "fast", "full"
+
+
+class CascadeStats:
+    """各级路由的累计统计"""
+
+    def __init__(self):
+        self.fast = 0
+        self.full = 0
+        self.fast_seconds = 0.0
+        self.full_seconds = 0.0
+
+    @property
+    def total(self) -> int:
+        return self.fast + self.full
+
+    def ratios(self) -> Dict[str, float]:
+        """返回各级处理的句子占比"""
+        if self.total == 0:
+            return {"fast": 0.0, "full": 0.0}
+        return {"fast": self.fast / self.total, "full": self.full / self.total}
+
+    def seconds_per_sentence(self) -> Dict[str, float]:
+        """返回各级处理每个句子的平均耗时（秒）"""
+        return {"fast": self.fast_seconds / self.fast if self.fast else 0.0,
+                "full": self.full_seconds / self.full if self.full else 0.0}
+
+
+def _is_non_content(text: str) -> bool:
+    """纯标点/空白的文本在任何标注器下都不含动词、形容词或名词"""
+    return not any(ch.isalnum() for ch in text)
+
+
+class CascadeAnalyzer:
+    """在快速分词结果足以确定卦象时跳过完整解析的级联分析器"""
+
+    def __init__(self, analyzer: Optional[YijingAnalyzer] = None, margin: Optional[float] = None):
+        """
+        Args:
+            analyzer: 第二级使用的完整分析器，默认新建
+            margin: None为严格模式；数值为近似模式的容差，应由 calibrate() 标定
+        """
+        self.analyzer = analyzer or YijingAnalyzer()
+        self.margin = margin
+        self.stats = CascadeStats()
+        self._stats_lock = threading.Lock()
+        # 长词优先，保证字符级扫描不会漏掉任何可能成为词元的情感词
+        lexicon = sorted(SENTIMENT_LEXICON, key=len, reverse=True)
+        self._lexicon_pattern = re.compile("|".join(map(re.escape, lexicon)))
+
+    def fast_score(self, sentence: str) -> Optional[float]:
+        """第一级：返回已能确定卦象的快速情感值，否则返回None"""
+        if self.margin is None:
+            # 严格模式只需字符级判断，见模块说明
+            return 0.0 if _is_non_content(sentence) else None
+        if self._lexicon_pattern.search(sentence):
+            return None
+
+        pairs = pseg.lcut(sentence)
+        words = [pair.word for pair in pairs]
+        estimate = score_tokens(words, [JIEBA_TO_UPOS.get(pair.flag[:1], _ZERO_TAG) for pair in pairs])
+        lower, upper = estimate - self.margin, estimate + self.margin
+        return estimate if map_to_gua(lower)[0] == map_to_gua(upper)[0] else None
+
+    def _route(self, text: str) -> Tuple[AnalysisResult, List[str], Tuple[float, float]]:
+        """分析文本，同时返回每个句子所走的层级，以及两级各自的耗时（秒）"""
+        start = time.perf_counter()
+        sentences = split_sentences(text)
+        fast_scores = [self.fast_score(sentence) for sentence in sentences]
+        routed = time.perf_counter()
+
+        pending = [s for s, score in zip(sentences, fast_scores) if score is None]
+        full_results = iter(self.analyzer.analyze_sentences(pending).gua_results)
+        parsed = time.perf_counter()
+
+        result = AnalysisResult()
+        tiers = []
+        for sentence, score in zip(sentences, fast_scores):
+            tiers.append(FULL if score is None else FAST)
+            if score is None:
+                score = next(full_results)["sentiment"]
+            gua, explanation = map_to_gua(score)
+            result.add(sentence, score, gua, explanation)
+        return result, tiers, (routed - start, parsed - routed)
+
+    def analyze(self, text: str) -> AnalysisResult:
+        """按级联路由分析文本，结果格式与 YijingAnalyzer.analyze 一致（分句方式不同）"""
+        result, tiers, (fast_seconds, full_seconds) = self._route(text)
+        with self._stats_lock:
+            self.stats.fast += tiers.count(FAST)
+            self.stats.full += tiers.count(FULL)
+            self.stats.fast_seconds += fast_seconds
+            self.stats.full_seconds += full_seconds
+        return result
+
+    def _compare(self, result: AnalysisResult, tiers: List[str],
+                 reference: AnalysisResult) -> Counter:
+        """按句子文本对齐级联结果与完整解析结果，统计各项计数"""
+        cascade_guas = defaultdict(list)
+        for res, tier in zip(result.gua_results, tiers):
+            cascade_guas[res["sentence"].strip()].append((res["gua"], tier))
+
+        counts = Counter(sentences=len(reference.gua_results), cascade_sentences=len(tiers),
+                         fast=tiers.count(FAST))
+        for ref in reference.gua_results:
+            candidates = cascade_guas.get(ref["sentence"].strip())
+            if not candidates:
+                continue
+            gua, tier = candidates.pop(0)
+            counts["matched"] += 1
+            counts["matched_agree"] += gua == ref["gua"]
+            if tier == FAST:
+                counts["matched_fast"] += 1
+                counts["matched_fast_agree"] += gua == ref["gua"]
+        for res in reference.gua_results:
+            counts[("ref", res["gua"])] += 1
+        for res in result.gua_results:
+            counts[("cascade", res["gua"])] += 1
+        return counts
+
+    @staticmethod
+    def _summarize(counts: Counter, seconds: Dict[str, float]) -> Dict[str, float]:
+        def ratio(num, den, empty=0.0):
+            return counts[num] / counts[den] if counts[den] else empty
+
+        cascade_seconds = seconds["fast"] + seconds["full"]
+
+        guas = {key[1] for key in counts if isinstance(key, tuple)}
+        distance = 0.5 * sum(abs(ratio(("ref", gua), "sentences") - ratio(("cascade", gua), "cascade_sentences"))
+                             for gua in guas)
+        return {
+            "sentences": counts["sentences"],
+            "cascade_sentences": counts["cascade_sentences"],
+            "fast_ratio": ratio("fast", "cascade_sentences"),
+            "full_ratio": 1 - ratio("fast", "cascade_sentences") if counts["cascade_sentences"] else 0.0,
+            "segmentation_agreement": ratio("matched", "sentences", 1.0),
+            "fast_compared": counts["matched_fast"],
+            "fast_agreement": ratio("matched_fast_agree", "matched_fast", 1.0),
+            "overall_agreement": ratio("matched_agree", "matched", 1.0),
+            "distribution_distance": distance,
+            "fast_seconds": seconds["fast"],
+            "full_seconds": seconds["full"],
+            "reference_seconds": seconds["reference"],
+            "speedup": seconds["reference"] / cascade_seconds if cascade_seconds > 0 else 1.0,
+        }
+
+    def evaluate(self, texts: Iterable[str]) -> Dict[str, float]:
+        """在样本语料上比较级联与生产环境的完整解析（YijingAnalyzer.analyze）
+
+        Returns:
+            字典，包含：
+            - fast_ratio / full_ratio：级联各级处理的句子占比
+            - segmentation_agreement：完整解析的句子中，级联切出同样句子的比例
+            - fast_compared：参与比较的第一级句子数
+            - fast_agreement：对齐句子中，第一级卦象与完整解析一致的比例
+            - overall_agreement：对齐句子中，级联卦象与完整解析一致的比例
+            - distribution_distance：两者卦象分布的总变差距离（含分句差异的影响）
+            - fast_seconds / full_seconds：级联第一级、第二级的总耗时（秒）
+            - reference_seconds：完整解析的总耗时（秒）
+            - speedup：完整解析耗时与级联总耗时之比
+        """
+        return self._evaluate_against(*self._references(texts))
+
+    def _references(self, texts: Iterable[str]) -> Tuple[List[Tuple[str, AnalysisResult]], float]:
+        """对每篇文本运行完整解析，返回 (文本, 结果) 列表与总耗时"""
+        start = time.perf_counter()
+        pairs = [(text, self.analyzer.analyze(text)) for text in texts]
+        return pairs, time.perf_counter() - start
+
+    def _evaluate_against(self, pairs: Sequence[Tuple[str, AnalysisResult]],
+                          reference_seconds: float) -> Dict[str, float]:
+        counts = Counter()
+        seconds = {"fast": 0.0, "full": 0.0, "reference": reference_seconds}
+        for text, reference in pairs:
+            result, tiers, (fast_seconds, full_seconds) = self._route(text)
+            counts.update(self._compare(result, tiers, reference))
+            seconds["fast"] += fast_seconds
+            seconds["full"] += full_seconds
+        return self._summarize(counts, seconds)
+
+    def calibrate(self, texts: Sequence[str], min_agreement: float = 0.99,
+                  margins: Sequence[float] = DEFAULT_MARGINS) -> Dict[str, float]:
+        """在真实模型输出上标定近似模式的容差
+
+        按从小到大的顺序尝试 margins，选择第一级一致率不低于 min_agreement 的
+        最小容差并设为 self.margin；都达不到时回退到严格模式（margin=None）。
+
+        Returns:
+            所选容差下的 evaluate() 结果，另含 "margin" 键
+        """
+        pairs, reference_seconds = self._references(texts)
+        for margin in sorted(margins):
+            self.margin = margin
+            report = self._evaluate_against(pairs, reference_seconds)
+            if report["fast_compared"] and report["fast_agreement"] >= min_agreement:
+                return {"margin": margin, **report}
+
+        self.margin = None
+        return {"margin": None, **self._evaluate_against(pairs, reference_seconds)}
+
+
+def main():
+    """在样本语料上输出级联路由比例与一致率"""
+    parser = argparse.ArgumentParser(description="分级分析级联评估")
+    parser.add_argument("-i", "--input", type=Path, nargs="+", required=True)
+    parser.add_argument("--margin", type=float,
+                        help="近似模式的容差（默认严格模式）")
+    parser.add_argument("--calibrate", type=float, metavar="MIN_AGREEMENT",
+                        help="按给定的第一级一致率下限标定容差")
+    args = parser.parse_args()
+
+    cascade = CascadeAnalyzer(margin=args.margin)
+    texts = [path.read_text(encoding="utf-8") for path in args.input]
+    if args.calibrate is not None:
+        report = cascade.calibrate(texts, min_agreement=args.calibrate)
+    else:
+        report = cascade.evaluate(texts)
+
+    print("级联评估结果")
+    print("-" * 40)
+    margin = report.get("margin", cascade.margin)
+    print(f"判定方式：{'严格模式' if margin is None else f'近似模式（容差 {margin}）'}")
+    print(f"完整解析句子数：{report['sentences']}，级联句子数：{report['cascade_sentences']}")
+    print(f"第一级（快速）占比：{report['fast_ratio']:.1%}")
+    print(f"第二级（完整解析）占比：{report['full_ratio']:.1%}")
+    print(f"分句一致率：{report['segmentation_agreement']:.1%}")
+    print(f"第一级与完整解析卦象一致率：{report['fast_agreement']:.1%}")
+    print(f"对齐句子卦象一致率：{report['overall_agreement']:.1%}")
+    print(f"卦象分布总变差距离：{report['distribution_distance']:.3f}")
+    print(f"耗时：第一级 {report['fast_seconds']:.2f}s，第二级 {report['full_seconds']:.2f}s，"
+          f"完整解析 {report['reference_seconds']:.2f}s，加速比 {report['speedup']:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -38,4 +38,20 @@ GUA_ATTRIBUTES = {
     "离": {"element": "火", "nature": "丽", "direction": "南"},
     "艮": {"element": "土", "nature": "止", "direction": "东北"},
     "兑": {"element": "金", "nature": "悦", "direction": "西"}
-}
\ No newline at end of file
+}
+
+# 六十四卦通行本卦序（文王卦序），下标即“卦序号-1”，用作固定的64维卦象编码
+GUA_ORDER = [
+    "乾", "坤", "屯", "蒙", "需", "讼", "师", "比", "小畜", "履", "泰", "否",
+    "同人", "大有", "谦", "豫", "随", "蛊", "临", "观", "噬嗑", "贲", "剥", "复",
+    "无妄", "大畜", "颐", "大过", "坎", "离", "咸", "恒", "遁", "大壮", "晋", "明夷",
+    "家人", "睽", "蹇", "解", "损", "益", "夬", "姤", "萃", "升", "困", "井",
+    "革", "鼎", "震", "艮", "渐", "归妹", "丰", "旅", "巽", "兑", "涣", "节",
+    "中孚", "小过", "既济", "未济"
+]
+GUA_INDEX = {name: idx for idx, name in enumerate(GUA_ORDER)}
+
+def gua_code(gua_name: str) -> int:
+    """返回卦象在 GUA_ORDER 中的编码，兼容“渐卦（䷴）”这类全名，未知卦象返回-1"""
+    short_name = gua_name.split("卦")[0].strip()
+    return GUA_INDEX.get(short_name, -1)
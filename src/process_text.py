@@ -8,41 +8,80 @@
 """
 import spacy
 from pathlib import Path
-from typing import List, Dict, Tuple
+from typing import Callable, List, Dict, Tuple, Iterable, Iterator, Optional, TextIO, Union
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
 import argparse
+import itertools
+import logging
 import sys
+import threading
 import time
-import math
+import re
 from collections import defaultdict
-from gua_config import GUAS, INTENSITY_RANK
+from gua_config import GUAS, INTENSITY_RANK, GUA_ATTRIBUTES
+import sentiment_scoring
+from sentiment_component import docs_from_bytes  # 同时注册 yijing 管线组件
 
 # 配置参数
 DEFAULT_MODEL = "zh_core_web_lg"
 
+def _classify_gua(gua_name: str, table: Dict[str, List[str]]) -> Optional[str]:
+    """返回卦象在分类表中的类别，未收录时返回None"""
+    for category, guas in table.items():
+        if gua_name in guas:
+            return category
+    return None
+
+# 句末标点（含中英文），用于不依赖模型的快速分句
+_SENTENCE_END = re.compile(r"(?<=[。！？!?；;…])|\n+")
+
+def split_sentences(text: str) -> List[str]:
+    """基于标点的快速分句，不调用spaCy解析"""
+    return [s.strip() for s in _SENTENCE_END.split(text) if s.strip()]
+
+@dataclass
+class AnalysisResult:
+    """一次分析的完整结果，与分析器实例状态相互独立"""
+    sentences: List[str] = field(default_factory=list)
+    gua_results: List[Dict] = field(default_factory=list)
+    polarity_stats: Dict[str, int] = field(default_factory=lambda: defaultdict(int))
+    intensity_stats: Dict[str, int] = field(default_factory=lambda: defaultdict(int))
+
+    def add(self, sentence: str, sentiment: float, gua: str, explanation: str) -> None:
+        """追加一条句子结果并更新极性/强度统计"""
+        self.sentences.append(sentence)
+        self.gua_results.append({
+            "sentence": sentence,
+            "sentiment": sentiment,
+            "gua": gua,
+            "explanation": explanation
+        })
+        polarity = _classify_gua(gua, GUAS)
+        if polarity is not None:
+            self.polarity_stats[polarity] += 1
+        intensity = _classify_gua(gua, INTENSITY_RANK)
+        if intensity is not None:
+            self.intensity_stats[intensity] += 1
+
 class YijingAnalyzer:
     """易经分析引擎（优化版）"""
     
-    # 添加情感词库缓存
-    SENTIMENT_LEXICON = {
-        # 基础情感词
-        "好": 0.5, "优秀": 0.7, "糟糕": -0.6,
-        "快乐": 0.6, "悲伤": -0.5, "愤怒": -0.7,
-        "喜悦": 0.8, "焦虑": -0.4, "平静": 0.3,
-        "满意": 0.6, "失望": -0.5, "期待": 0.4,
-        # 扩展情感词
-        "美好": 0.7, "卓越": 0.8, "杰出": 0.8,
-        "欢欣": 0.7, "愉悦": 0.6, "舒畅": 0.5,
-        "忧伤": -0.6, "痛苦": -0.8, "恐惧": -0.7,
-        "烦恼": -0.5, "沮丧": -0.6, "绝望": -0.9,
-        "温暖": 0.4, "温馨": 0.5, "祥和": 0.6,
-        "冷漠": -0.4, "阴郁": -0.5, "压抑": -0.6
-    }
-    NEGATION_WORDS = {"不", "没", "非", "未", "别", "莫", "勿", "无", "否", "休", "绝", "难", "决", "忌"}
+    # 打分规则见 sentiment_scoring，这里保留类属性便于旧代码访问
+    SENTIMENT_LEXICON = sentiment_scoring.SENTIMENT_LEXICON
+    NEGATION_WORDS = sentiment_scoring.NEGATION_WORDS
+
+    # 模型只加载一次，由所有实例和线程共享
+    _model_lock = threading.Lock()
 
     def __init__(self):
-        if not hasattr(self.__class__, '_nlp'):
-            self.__class__._nlp = self._load_model()
-        self.nlp = self.__class__._nlp
+        cls = self.__class__
+        if not hasattr(cls, '_nlp'):
+            with cls._model_lock:
+                if not hasattr(cls, '_nlp'):
+                    cls._nlp = self._load_model()
+        self.nlp = cls._nlp
+        # 旧接口 analyze_text 的结果，仅保存最近一次分析
         self.sentences = []
         self.gua_results = []
         self.polarity_stats = defaultdict(int)
@@ -52,245 +91,292 @@ class YijingAnalyzer:
         try:
             nlp = spacy.load(DEFAULT_MODEL)
             if not nlp.has_pipe("sentiment"):
-                nlp.add_pipe("sentiment", last=True)
+                nlp.add_pipe("yijing", name="sentiment", last=True)
             return nlp
         except OSError:
             print(f"请先安装中文模型: python -m spacy download {DEFAULT_MODEL}")
             sys.exit(1)
-    
-    def analyze_text(self, text: str) -> None:
-        doc = self.nlp(text)
-        self.sentences = [sent.text for sent in doc.sents]
-        self._analyze_sentiments(doc)
-        self._analyze_polarity_and_intensity()
-    
-    def _analyze_sentiments(self, doc) -> None:
+
+    def analyze(self, text: str) -> AnalysisResult:
+        """无状态分析接口
+
+        不读写实例上的任何结果状态，同一个实例（及其共享模型）
+        可以被多个线程并发调用，每次调用返回独立的结果。
+        """
+        return self.result_from_doc(self.nlp(text))
+
+    def analyze_pipe(self, texts: Iterable[str], n_process: int = 1,
+                     batch_size: int = 64) -> Iterator[AnalysisResult]:
+        """通过 nlp.pipe 批量分析，情感打分在各工作进程的管线组件中完成"""
+        for doc in self.nlp.pipe(texts, n_process=n_process, batch_size=batch_size):
+            yield self.result_from_doc(doc)
+
+    @staticmethod
+    def result_from_doc(doc) -> AnalysisResult:
+        """读取 yijing 组件写入的句子级扩展属性，生成分析结果"""
+        result = AnalysisResult()
         for sent in doc.sents:
-            sentiment = self._calculate_sentiment(sent)
-            gua = self._map_to_gua(sentiment)
-            self.gua_results.append({
-                "sentence": sent.text,
-                "sentiment": sentiment,
-                "gua": gua[0],
-                "explanation": gua[1]
-            })
-    
-    def _analyze_polarity_and_intensity(self) -> None:
-        for result in self.gua_results:
-            gua_name = result["gua"]
-            # 统计极性
-            for polarity, guas in GUAS.items():
-                if gua_name in guas:
-                    self.polarity_stats[polarity] += 1
-                    break
-            # 统计强度
-            for intensity, guas in INTENSITY_RANK.items():
-                if gua_name in guas:
-                    self.intensity_stats[intensity] += 1
-                    break
-
-    def _calculate_sentiment(self, sent) -> float:
+            result.add(sent.text, sent._.sentiment, sent._.gua, sent._.gua_explanation)
+        return result
+
+    @classmethod
+    def results_from_bytes(cls, data: bytes, vocab) -> List[AnalysisResult]:
+        """从 sentiment_component.docs_to_bytes 的输出恢复分析结果，无需重新运行管线"""
+        return [cls.result_from_doc(doc) for doc in docs_from_bytes(data, vocab)]
+
+    def analyze_sentences(self, sentences: Iterable[str], batch_size: int = 256) -> AnalysisResult:
+        """对已切分好的句子逐句分析（每个句子作为一个整体打分，读取文档级结果）"""
+        result = AnalysisResult()
+        for doc in self.nlp.pipe(sentences, batch_size=batch_size):
+            result.add(doc.text, doc._.sentiment, doc._.gua, doc._.gua_explanation)
+        return result
+
+    def analyze_batch(self, texts: Iterable[str], max_workers: int = 4) -> List[AnalysisResult]:
+        """使用线程池批量分析文本，结果顺序与输入一致"""
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            return list(pool.map(self.analyze, texts))
+
+    def analyze_files(self, paths: Iterable[Path], max_workers: int = 4,
+                      reader: Optional[Callable[[Path], str]] = None) -> List[AnalysisResult]:
+        """使用线程池批量读取并分析文件（读取I/O与解析在线程间重叠）
+
+        Args:
+            paths: 文件路径
+            max_workers: 线程数
+            reader: 读取文件内容的函数，默认按UTF-8读取本地文件
+        """
+        def _read_and_analyze(path):
+            path = Path(path)
+            text = reader(path) if reader else path.read_text(encoding="utf-8")
+            return self.analyze(text)
+
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            return list(pool.map(_read_and_analyze, paths))
+
+    def analyze_text(self, text: str) -> None:
+        """分析文本并把结果保存在实例上（旧接口，非线程安全）"""
+        result = self.analyze(text)
+        self.sentences = result.sentences
+        self.gua_results = result.gua_results
+        self.polarity_stats = result.polarity_stats
+        self.intensity_stats = result.intensity_stats
+
+    @staticmethod
+    def _calculate_sentiment(sent) -> float:
         """增强型情感计算"""
-        try:
-            # 合并词性权重、情感词库和否定词处理
-            pos_weights = {"VERB": 0.3, "ADJ": 0.5, "NOUN": 0.2}
-            score = 0.0
-            negation = False
-            sent_length = len(sent)
-            
-            if sent_length == 0:  # 处理空句子
-                return 0.0
-
-            for i, token in enumerate(sent):
-                # 情感词库优先
-                if token.text in self.SENTIMENT_LEXICON:
-                    word_score = self.SENTIMENT_LEXICON[token.text]
-                    # 检查前三个词是否有否定词
-                    negation = any(w.text in self.NEGATION_WORDS 
-                                for w in sent[max(0,i-3):i])
-                    score += -word_score if negation else word_score
-                elif token.pos_ in pos_weights:
-                    score += pos_weights[token.pos_]
-            
-            # 加入句子长度衰减因子
-            return math.tanh(score * math.log(sent_length + 1) / sent_length)
-        except Exception as e:
-            logging.error(f"情感计算出错：{e}")
-            return 0.0
-
-    def _map_to_gua(self, score: float) -> Tuple[str, str]:
+        return sentiment_scoring.calculate_sentiment(sent)
+
+    @staticmethod
+    def _score_tokens(words: List[str], tags: List[str]) -> float:
+        """根据词序列及其通用词性（UPOS）计算情感值"""
+        return sentiment_scoring.score_tokens(words, tags)
+
+    @staticmethod
+    def _map_to_gua(score: float) -> Tuple[str, str]:
         """优化卦象映射逻辑"""
-        try:
-            # 按顺序检查区间（修正坤卦重复问题）
-            intervals = [
-                (0.8, 1.0, ("乾", "天行健，君子以自强不息")),
-                (0.6, 0.8, ("离", "明两作，离，大人以继明照于四方")),
-                (0.4, 0.6, ("巽", "随风巽，君子以申命行事")),
-                (0.2, 0.4, ("艮", "兼山艮，君子以思不出其位")),
-                (0.0, 0.2, ("坤", "地势坤，君子以厚德载物")),
-                (-0.2, 0.0, ("震", "洊雷震，君子以恐惧修省")),
-                (-0.4, -0.2, ("兑", "丽泽兑，君子以朋友讲习")),
-                (-0.6, -0.4, ("坎", "水洊至，习坎，君子以常德行")),
-                (-1.0, -0.6, ("复", "反复其道，七日来复"))  # 修正坤卦为复卦
-            ]
-            
-            for lower, upper, gua in intervals:
-                if lower < score <= upper:
-                    return gua
-            return ("未济", "物不可穷也，故受之以未济终焉")
-        except Exception as e:
-            logging.error(f"卦象映射出错：{e}")
-            return ("未济", "映射出错，默认未济")
+        return sentiment_scoring.map_to_gua(score)
 
 class ReportGenerator:
-    def __init__(self, analyzer: YijingAnalyzer):
+    """分析报告生成器（惰性流式渲染）
+
+    报告由若干章节组成，每个章节都是逐行产出的生成器，
+    可以直接流式写入控制台或文件，而无需先在内存中拼出完整报告。
+    """
+
+    # 章节名称 -> 渲染方法（顺序即报告顺序）
+    SECTIONS = {
+        "header": "_iter_header",
+        "statistics": "_iter_statistics",
+        "polarity": "_iter_polarity_analysis",
+        "intensity": "_iter_intensity_analysis",
+        "gua": "_iter_gua_analysis",
+        "detail": "_iter_detailed_mapping",
+    }
+
+    def __init__(self, analyzer: Union[YijingAnalyzer, AnalysisResult], detail_offset: int = 0,
+                 detail_limit: Optional[int] = None):
+        """
+        Args:
+            analyzer: 分析结果（AnalysisResult，或已调用 analyze_text 的分析器）
+            detail_offset: 映射明细从第几条开始输出（用于分页）
+            detail_limit: 映射明细最多输出的条数，None表示不限制
+        """
         self.analyzer = analyzer
-        self.report = []
-        
-    def generate(self) -> List[str]:
-        self._add_header()
-        self._add_statistics()
-        self._add_polarity_analysis()
-        self._add_intensity_analysis()
-        self._add_gua_analysis()
-        self._add_detailed_mapping()
-        return self.report
-    
-    def _add_polarity_analysis(self):
-        """添加极性分析报告"""
+        if detail_offset < 0:
+            raise ValueError(f"映射明细的起始条目不能为负数：{detail_offset}")
+        if detail_limit is not None and detail_limit < 0:
+            raise ValueError(f"映射明细的条数不能为负数：{detail_limit}")
+        self.detail_offset = detail_offset
+        self.detail_limit = detail_limit
+
+    def _resolve_sections(self, sections: Optional[Iterable[str]]) -> List[str]:
+        if sections is None:
+            return list(self.SECTIONS)
+        names = list(sections)
+        unknown = [name for name in names if name not in self.SECTIONS]
+        if unknown:
+            raise ValueError(f"未知的报告章节：{', '.join(unknown)}")
+        return names
+
+    def iter_sections(self, sections: Optional[Iterable[str]] = None) -> Iterator[Tuple[str, Iterator[str]]]:
+        """按顺序产出 (章节名, 行生成器)，章节内容在迭代时才渲染"""
+        for name in self._resolve_sections(sections):
+            yield name, getattr(self, self.SECTIONS[name])()
+
+    def iter_lines(self, sections: Optional[Iterable[str]] = None) -> Iterator[str]:
+        """惰性产出报告的每一行"""
+        for _, lines in self.iter_sections(sections):
+            yield from lines
+
+    def generate(self, sections: Optional[Iterable[str]] = None) -> List[str]:
+        """渲染完整报告（兼容旧接口，会把所有行载入内存）"""
+        return list(self.iter_lines(sections))
+
+    def write(self, stream: TextIO, sections: Optional[Iterable[str]] = None) -> int:
+        """将报告逐行写入文本流，返回写入的行数"""
+        count = 0
+        for line in self.iter_lines(sections):
+            stream.write(line + "\n")
+            count += 1
+        return count
+
+    def _iter_polarity_analysis(self) -> Iterator[str]:
+        """极性分析报告"""
         total = sum(self.analyzer.polarity_stats.values())
         if total == 0:
             return
-            
-        self.report.extend([
-            "文本极性分析",
-            "-" * 40,
-            "📊 极性分布："
-        ])
-        
+
+        yield "文本极性分析"
+        yield "-" * 40
+        yield "📊 极性分布："
         for polarity, count in self.analyzer.polarity_stats.items():
             percentage = count / total * 100
             polarity_cn = {"positive": "积极", "neutral": "中性", "negative": "消极"}[polarity]
-            self.report.append(f"  - {polarity_cn}：{count}次 ({percentage:.1f}%)")
-        self.report.append("")
-    
-    def _add_intensity_analysis(self):
-        """添加强度分析报告"""
+            yield f"  - {polarity_cn}：{count}次 ({percentage:.1f}%)"
+        yield ""
+
+    def _iter_intensity_analysis(self) -> Iterator[str]:
+        """强度分析报告"""
         total = sum(self.analyzer.intensity_stats.values())
         if total == 0:
             return
-            
-        self.report.extend([
-            "情感强度分析",
-            "-" * 40,
-            "📈 强度分布："
-        ])
-        
+
+        yield "情感强度分析"
+        yield "-" * 40
+        yield "📈 强度分布："
         for intensity, count in self.analyzer.intensity_stats.items():
             percentage = count / total * 100
             intensity_cn = {"high": "高", "medium": "中", "low": "低"}[intensity]
-            self.report.append(f"  - {intensity_cn}强度：{count}次 ({percentage:.1f}%)")
-        self.report.append("")
+            yield f"  - {intensity_cn}强度：{count}次 ({percentage:.1f}%)"
+        yield ""
 
-    def _add_header(self):
+    def _iter_header(self) -> Iterator[str]:
         """报告头部信息"""
-        self.report.extend([
-            "易经文本分析报告",
-            "=" * 40,
-            f"生成时间：{time.strftime('%Y-%m-%d %H:%M:%S')}",
-            f"分析模型：{DEFAULT_MODEL} (spaCy v{spacy.__version__})",
-            ""
-        ])
-    
-    def _add_statistics(self):
+        yield "易经文本分析报告"
+        yield "=" * 40
+        yield f"生成时间：{time.strftime('%Y-%m-%d %H:%M:%S')}"
+        yield f"分析模型：{DEFAULT_MODEL} (spaCy v{spacy.__version__})"
+        yield ""
+
+    def _iter_statistics(self) -> Iterator[str]:
         """统计信息模块"""
-        stats = {
-            "总句子数": len(self.analyzer.sentences),
-            "卦象分布": defaultdict(int)
-        }
+        total = len(self.analyzer.sentences)
+        distribution = defaultdict(int)
         for res in self.analyzer.gua_results:
-            stats["卦象分布"][res["gua"]] += 1
-        
-        self.report.extend([
-            "统计摘要",
-            "-" * 40,
-            f"📊 总句子数：{stats['总句子数']}",
-            "📈 卦象分布："
-        ])
-        for gua, count in stats["卦象分布"].items():
-            self.report.append(f"  - {gua}卦：{count}次 ({count/stats['总句子数']:.1%})")
-        self.report.append("")
-    
-    def _add_gua_analysis(self):
+            distribution[res["gua"]] += 1
+
+        yield "统计摘要"
+        yield "-" * 40
+        yield f"📊 总句子数：{total}"
+        yield "📈 卦象分布："
+        for gua, count in distribution.items():
+            yield f"  - {gua}卦：{count}次 ({count/total:.1%})"
+        yield ""
+
+    def _iter_gua_analysis(self) -> Iterator[str]:
         """卦象深度解析"""
-        self.report.extend([
-            "卦象特征分析",
-            "-" * 40
-        ])
+        yield "卦象特征分析"
+        yield "-" * 40
+
+        # 单次遍历收集每个卦象的卦辞与前三条例句
         gua_explanations = {}
-        gua_attributes = {}
-        
+        gua_examples = defaultdict(list)
         for res in self.analyzer.gua_results:
             gua = res["gua"]
-            if gua not in gua_explanations:
-                gua_explanations[gua] = res["explanation"]
-                # 获取卦象属性
-                if gua in GUA_ATTRIBUTES:
-                    gua_attributes[gua] = GUA_ATTRIBUTES[gua]
-        
+            gua_explanations.setdefault(gua, res["explanation"])
+            if len(gua_examples[gua]) < 3:
+                gua_examples[gua].append(res["sentence"])
+
         for gua, exp in gua_explanations.items():
-            self.report.extend([
-                f"【{gua}卦】解析：",
-                f"  卦辞：{exp}"
-            ])
-            
+            yield f"【{gua}卦】解析："
+            yield f"  卦辞：{exp}"
+
             # 添加卦象属性信息
-            if gua in gua_attributes:
-                attrs = gua_attributes[gua]
-                self.report.extend([
-                    f"  五行：{attrs['element']}",
-                    f"  性质：{attrs['nature']}",
-                    f"  方位：{attrs['direction']}"
-                ])
-            
-            self.report.append("  典型例句：")
-            examples = [r["sentence"] for r in self.analyzer.gua_results if r["gua"] == gua][:3]
-            for ex in examples:
-                self.report.append(f"  - {ex[:50]}...")
-            self.report.append("")
-    
-    def _add_detailed_mapping(self):
-        """详细映射表"""
-        self.report.extend([
-            "句子-卦象映射明细",
-            "-" * 40,
-            "序号 | 卦象 | 情感值 | 句子摘要"
-        ])
-        for idx, res in enumerate(self.analyzer.gua_results, 1):
-            self.report.append(
-                f"{idx:04d} | {res['gua']:2} | {res['sentiment']:+.2f} | "
-                f"{res['sentence'][:60].replace('\n', ' ')}..."
-            )
+            if gua in GUA_ATTRIBUTES:
+                attrs = GUA_ATTRIBUTES[gua]
+                yield f"  五行：{attrs['element']}"
+                yield f"  性质：{attrs['nature']}"
+                yield f"  方位：{attrs['direction']}"
+
+            yield "  典型例句："
+            for ex in gua_examples[gua]:
+                yield f"  - {ex[:50]}..."
+            yield ""
+
+    def _iter_detailed_mapping(self) -> Iterator[str]:
+        """详细映射表（支持分页）"""
+        yield "句子-卦象映射明细"
+        yield "-" * 40
+        yield "序号 | 卦象 | 情感值 | 句子摘要"
+
+        start = self.detail_offset
+        stop = None if self.detail_limit is None else start + self.detail_limit
+        rows = itertools.islice(enumerate(self.analyzer.gua_results, 1), start, stop)
+        for idx, res in rows:
+            summary = res['sentence'][:60].replace('\n', ' ')
+            yield f"{idx:04d} | {res['gua']:2} | {res['sentiment']:+.2f} | {summary}..."
+
+def _non_negative_int(value: str) -> int:
+    """argparse 类型：非负整数"""
+    number = int(value)
+    if number < 0:
+        raise argparse.ArgumentTypeError(f"必须为非负整数：{value}")
+    return number
 
 def main():
     """主控程序"""
     parser = argparse.ArgumentParser(description="易经文本分析系统")
     parser.add_argument("-i", "--input", type=Path, required=True)
     parser.add_argument("-o", "--output", type=Path)
+    parser.add_argument("--sections", nargs="+", choices=list(ReportGenerator.SECTIONS),
+                        help="只输出指定章节（默认输出全部章节）")
+    parser.add_argument("--detail-offset", type=_non_negative_int, default=0,
+                        help="映射明细的起始条目（用于分页）")
+    parser.add_argument("--detail-limit", type=_non_negative_int,
+                        help="映射明细最多输出的条数")
+    parser.add_argument("--preview-lines", type=_non_negative_int, default=50,
+                        help="控制台预览的行数")
     args = parser.parse_args()
 
     analyzer = YijingAnalyzer()
     analyzer.analyze_text(args.input.read_text(encoding="utf-8"))
-    
-    report = ReportGenerator(analyzer).generate()
-    
-    # 控制台输出
-    print("\n".join(report[:50]))
-    
-    # 文件输出
+
+    generator = ReportGenerator(analyzer, detail_offset=args.detail_offset,
+                                detail_limit=args.detail_limit)
+    lines = generator.iter_lines(args.sections)
+
     if args.output:
-        args.output.write_text("\n".join(report), encoding="utf-8")
+        # 单次遍历：同时流式写入文件并在控制台预览前若干行
+        with args.output.open("w", encoding="utf-8") as f:
+            for idx, line in enumerate(lines):
+                if idx < args.preview_lines:
+                    print(line)
+                f.write(line + "\n")
         print(f"报告已保存至：{args.output}")
+    else:
+        # 仅预览时只渲染需要显示的行
+        for line in itertools.islice(lines, args.preview_lines):
+            print(line)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
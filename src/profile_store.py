@@ -0,0 +1,185 @@
+"""文档卦象画像索引
+
+把每篇文档的聚合统计（64维卦象直方图、极性/强度分布、平均情感值）
+保存为本地列式索引：向量以float32逐行追加到内存映射文件，文档ID按行
+保存在文本文件中。相似度查询对内存映射矩阵分块做向量化计算。
+"""
+from pathlib import Path
+from typing import Iterable, List, Optional, Tuple, Union
+
+import numpy as np
+
+from gua_config import GUA_ORDER, gua_code
+from process_text import AnalysisResult
+
+POLARITY_KEYS = ("positive", "neutral", "negative")
+INTENSITY_KEYS = ("high", "medium", "low")
+# 向量布局：[64卦直方图 | 极性分布 | 强度分布 | 平均情感值]
+PROFILE_DIM = len(GUA_ORDER) + len(POLARITY_KEYS) + len(INTENSITY_KEYS) + 1
+
+
+def profile_vector(result: AnalysisResult) -> np.ndarray:
+    """把一次分析结果聚合为定长的文档画像向量"""
+    vector = np.zeros(PROFILE_DIM, dtype=np.float32)
+    total = len(result.gua_results)
+    if total == 0:
+        return vector
+
+    for res in result.gua_results:
+        code = gua_code(res["gua"])
+        if code >= 0:
+            vector[code] += 1
+    vector[:len(GUA_ORDER)] /= total
+
+    offset = len(GUA_ORDER)
+    for keys, stats in ((POLARITY_KEYS, result.polarity_stats),
+                        (INTENSITY_KEYS, result.intensity_stats)):
+        classified = sum(stats.values())
+        if classified:
+            vector[offset:offset + len(keys)] = [stats.get(key, 0) / classified for key in keys]
+        offset += len(keys)
+
+    vector[offset] = sum(res["sentiment"] for res in result.gua_results) / total
+    return vector
+
+
+class ProfileStore:
+    """支持增量追加和top-k相似度查询的文档画像索引"""
+
+    VECTOR_FILE = "profiles.f32"
+    ID_FILE = "doc_ids.txt"
+
+    def __init__(self, directory: Union[str, Path]):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._vector_path = self.directory / self.VECTOR_FILE
+        self._id_path = self.directory / self.ID_FILE
+        self._vector_path.touch(exist_ok=True)
+        self._id_path.touch(exist_ok=True)
+
+        self._doc_ids = self._repair()
+        self._matrix = None
+
+    @property
+    def _row_bytes(self) -> int:
+        return PROFILE_DIM * np.dtype(np.float32).itemsize
+
+    def _repair(self) -> List[str]:
+        """恢复中断写入，保证向量与ID一一对应，返回完整的文档ID列表
+
+        - ID文件末尾缺少换行符的半行是未写完的ID，丢弃
+        - 没有完整向量的ID（向量文件偏短）丢弃
+        - 多余的向量行（含半截向量）截掉
+        """
+        lines = self._id_path.read_bytes().split(b"\n")[:-1]  # 最后一段是半行或空串
+        rows = self._vector_path.stat().st_size // self._row_bytes
+        lines = lines[:rows]
+
+        id_bytes = sum(len(line) + 1 for line in lines)
+        if self._id_path.stat().st_size > id_bytes:
+            with open(self._id_path, "r+b") as f:
+                f.truncate(id_bytes)
+        expected = len(lines) * self._row_bytes
+        if self._vector_path.stat().st_size > expected:
+            with open(self._vector_path, "r+b") as f:
+                f.truncate(expected)
+        return [line.decode("utf-8") for line in lines]
+
+    def __len__(self) -> int:
+        return len(self._doc_ids)
+
+    @property
+    def doc_ids(self) -> List[str]:
+        return list(self._doc_ids)
+
+    def vectors(self) -> np.ndarray:
+        """以只读内存映射的方式返回全部画像向量，形状为 (文档数, PROFILE_DIM)"""
+        if self._matrix is None:
+            if not self._doc_ids:
+                return np.empty((0, PROFILE_DIM), dtype=np.float32)
+            self._matrix = np.memmap(self._vector_path, dtype=np.float32, mode="r",
+                                     shape=(len(self._doc_ids), PROFILE_DIM))
+        return self._matrix
+
+    def append(self, doc_id: str, profile: Union[AnalysisResult, np.ndarray]) -> None:
+        """追加一篇文档的画像"""
+        self.extend([(doc_id, profile)])
+
+    def extend(self, items: Iterable[Tuple[str, Union[AnalysisResult, np.ndarray]]]) -> None:
+        """批量追加文档画像（先写向量再写ID，中断时由 _repair 恢复）"""
+        doc_ids, rows = [], []
+        for doc_id, profile in items:
+            if "\n" in doc_id or "\r" in doc_id:
+                raise ValueError(f"文档ID不能包含换行符：{doc_id!r}")
+            rows.append(self._as_vector(profile))
+            doc_ids.append(doc_id)
+        if not rows:
+            return
+
+        with open(self._vector_path, "ab") as f:
+            f.write(np.stack(rows).astype(np.float32, copy=False).tobytes())
+        # 以二进制写入，各平台上都以 b"\n" 结尾，与 _repair 的按字节解析一致
+        with open(self._id_path, "ab") as f:
+            f.writelines(doc_id.encode("utf-8") + b"\n" for doc_id in doc_ids)
+        self._doc_ids.extend(doc_ids)
+        self._matrix = None  # 文件已增长，下次访问时重新映射
+
+    @staticmethod
+    def _as_vector(profile: Union[AnalysisResult, np.ndarray]) -> np.ndarray:
+        if isinstance(profile, AnalysisResult):
+            return profile_vector(profile)
+        vector = np.asarray(profile, dtype=np.float32)
+        if vector.shape != (PROFILE_DIM,):
+            raise ValueError(f"画像向量维度应为{PROFILE_DIM}，实际为{vector.shape}")
+        return vector
+
+    def query(self, profile: Union[AnalysisResult, np.ndarray], k: int = 10,
+              metric: str = "cosine", chunk_size: int = 65536,
+              exclude: Optional[str] = None) -> List[Tuple[str, float]]:
+        """查询与给定画像最相似的k篇文档
+
+        Args:
+            profile: 查询画像（分析结果或画像向量）
+            k: 返回的文档数
+            metric: "cosine"（相似度，越大越相似）或 "euclidean"（距离，越小越相似）
+            chunk_size: 每次载入内存计算的行数
+            exclude: 需要排除的文档ID（例如查询文档自身）
+
+        Returns:
+            按相似程度排序的 (文档ID, 得分) 列表
+        """
+        if metric not in ("cosine", "euclidean"):
+            raise ValueError(f"不支持的距离度量：{metric}")
+        query = self._as_vector(profile)
+        matrix = self.vectors()
+        if len(matrix) == 0 or k <= 0:
+            return []
+
+        query_norm = np.linalg.norm(query)
+        best_scores = np.empty(0, dtype=np.float32)
+        best_rows = np.empty(0, dtype=np.int64)
+        for start in range(0, len(matrix), chunk_size):
+            chunk = np.asarray(matrix[start:start + chunk_size])
+            if metric == "cosine":
+                norms = np.linalg.norm(chunk, axis=1) * query_norm
+                # 统一为“越小越相似”，便于合并候选
+                scores = -np.divide(chunk @ query, norms, out=np.zeros(len(chunk), dtype=np.float32),
+                                    where=norms > 0)
+            else:
+                scores = np.linalg.norm(chunk - query, axis=1)
+
+            candidates = np.concatenate([best_scores, scores])
+            rows = np.concatenate([best_rows, np.arange(start, start + len(chunk))])
+            keep = min(k + (exclude is not None), len(candidates))
+            top = np.argpartition(candidates, keep - 1)[:keep]
+            best_scores, best_rows = candidates[top], rows[top]
+
+        order = np.argsort(best_scores, kind="stable")
+        sign = -1.0 if metric == "cosine" else 1.0
+        results = []
+        for idx in order:
+            doc_id = self._doc_ids[best_rows[idx]]
+            if doc_id == exclude:
+                continue
+            results.append((doc_id, sign * float(best_scores[idx])))
+        return results[:k]
@@ -0,0 +1,314 @@
+"""近似语料统计
+
+仪表盘只需要卦象、极性与强度分布，而不需要逐句映射。本模块对语料按句抽样
+（按比例的伯努利抽样，或按误差目标确定容量的蓄水池抽样，可按文件分层），
+只对样本运行分析器，并给出各分布的置信区间与实际加速比。
+"""
+import argparse
+import math
+import random
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from statistics import NormalDist
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from gua_config import GUAS, INTENSITY_RANK
+from process_text import AnalysisResult, YijingAnalyzer, split_sentences
+
+
+@dataclass
+class Stratum:
+    """一个抽样层（默认每个文件一层）"""
+    name: str
+    population: int = 0
+    sentences: List[str] = field(default_factory=list)
+
+
+@dataclass
+class Estimate:
+    """点估计及其置信区间"""
+    value: float
+    low: float
+    high: float
+
+
+@dataclass
+class ApproximateStats:
+    """基于样本的近似统计结果（比例均为占全部句子的比例）"""
+    population: int
+    sample_size: int
+    confidence: float
+    mean_sentiment: Estimate
+    gua: Dict[str, Estimate]
+    polarity: Dict[str, Estimate]
+    intensity: Dict[str, Estimate]
+    scan_seconds: float = 0.0
+    analysis_seconds: float = 0.0
+    dropped_strata: int = 0       # 有句子但没有样本结果、未参与估计的层数
+    dropped_population: int = 0   # 这些层的总体句数
+
+    @property
+    def speedup(self) -> float:
+        """以样本上的单句分析耗时外推全量耗时，与实际耗时（扫描+分析）之比"""
+        elapsed = self.scan_seconds + self.analysis_seconds
+        if self.sample_size == 0 or elapsed <= 0:
+            return 1.0
+        full_seconds = self.analysis_seconds / self.sample_size * self.population
+        return full_seconds / elapsed
+
+
+def _z_score(confidence: float) -> float:
+    return NormalDist().inv_cdf((1 + confidence) / 2)
+
+
+def sample_size_for_error(error: float, confidence: float = 0.95,
+                          population: Optional[int] = None) -> int:
+    """比例估计的置信区间半宽不超过 error 时所需的样本量（按最坏情况 p=0.5）"""
+    if not 0 < error < 1:
+        raise ValueError(f"误差目标必须在(0, 1)之间：{error}")
+    n0 = _z_score(confidence) ** 2 * 0.25 / error ** 2
+    if population:
+        # 有限总体校正
+        n0 = n0 / (1 + (n0 - 1) / population)
+    return math.ceil(n0)
+
+
+def iter_sentences(path: Path) -> Iterator[str]:
+    """逐行读取文件并快速分句，避免把整个文件载入内存"""
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            yield from split_sentences(line)
+
+
+def _reservoir(items: Iterable[str], capacity: int, rng: random.Random) -> List[str]:
+    """蓄水池抽样：单遍等概率抽取至多 capacity 个元素，内存只占 capacity 个"""
+    sample = []
+    for i, item in enumerate(items):
+        if i < capacity:
+            sample.append(item)
+        else:
+            j = rng.randrange(i + 1)
+            if j < capacity:
+                sample[j] = item
+    return sample
+
+
+def sample_corpus(paths: Iterable[Path], rate: Optional[float] = None,
+                  error: Optional[float] = None, confidence: float = 0.95,
+                  stratify: bool = True, seed: Optional[int] = None) -> List[Stratum]:
+    """扫描语料并抽取句子样本
+
+    按比例抽样只扫描一遍。按误差目标抽样扫描两遍：第一遍只统计各层句数，
+    按全局样本量（含有限总体校正）在各层间按比例分配容量；第二遍各层用
+    该容量的蓄水池抽样，因此内存中最多只保留约一份全局样本。
+
+    Args:
+        paths: 语料文件路径
+        rate: 抽样比例（伯努利抽样），与 error 二选一
+        error: 比例估计的目标误差（置信区间半宽），按此确定样本量并使用蓄水池抽样
+        confidence: 置信水平
+        stratify: 是否按文件分层
+        seed: 随机种子
+
+    Returns:
+        各抽样层（含总体句数与样本句子）。按比例抽样时，每个非空层至少保留一句
+        （伯努利抽样未选中任何句子时，取该层大小为1的蓄水池样本）。
+    """
+    if (rate is None) == (error is None):
+        raise ValueError("必须且只能指定 rate 或 error 之一")
+    if rate is not None and not 0 < rate <= 1:
+        raise ValueError(f"抽样比例必须在(0, 1]之间：{rate}")
+
+    rng = random.Random(seed)
+    paths = list(paths)
+    if stratify:
+        groups = [(Stratum(str(path)), [path]) for path in paths]
+    else:
+        groups = [(Stratum("全部语料"), paths)] if paths else []
+
+    def stratum_sentences(group):
+        return (sentence for path in group for sentence in iter_sentences(path))
+
+    if error is None:
+        for stratum, group in groups:
+            fallback = None  # 大小为1的蓄水池样本
+            for sentence in stratum_sentences(group):
+                stratum.population += 1
+                if rng.random() < rate:
+                    stratum.sentences.append(sentence)
+                if rng.randrange(stratum.population) == 0:
+                    fallback = sentence
+            if stratum.population and not stratum.sentences:
+                stratum.sentences.append(fallback)
+        return [stratum for stratum, _ in groups]
+
+    for stratum, group in groups:
+        stratum.population = sum(1 for _ in stratum_sentences(group))
+    total = sum(stratum.population for stratum, _ in groups)
+    if total:
+        n = sample_size_for_error(error, confidence, total)
+        for stratum, group in groups:
+            if stratum.population:
+                capacity = min(stratum.population, max(1, math.ceil(n * stratum.population / total)))
+                stratum.sentences = _reservoir(stratum_sentences(group), capacity, rng)
+    return [stratum for stratum, _ in groups]
+
+
+def _stratified_estimate(parts: List[tuple], z: float) -> Estimate:
+    """分层均值估计
+
+    只有一个样本的层无法估计层内方差（小文件在按比例抽样的保底、或按误差
+    目标分配到1句时很常见），把这些层合并为一个层计算方差；合并后仍只有
+    一个样本时，使用其余各层的合并层内方差。
+
+    Args:
+        parts: 每层的 (层权重, 总体句数, 样本值列表)
+    """
+    value = variance = 0.0
+    pooled_ss = pooled_df = 0.0
+    singles = []
+    for weight, population, values in parts:
+        n = len(values)
+        mean = sum(values) / n
+        value += weight * mean
+        if n > 1:
+            ss = sum((v - mean) ** 2 for v in values)
+            variance += weight ** 2 * (1 - n / population) * ss / (n - 1) / n
+            pooled_ss += ss
+            pooled_df += n - 1
+        elif population > 1:  # 只有一个样本且不是普查
+            singles.append((weight, population, values[0]))
+
+    if singles:
+        weight = sum(w for w, _, _ in singles)
+        population = sum(p for _, p, _ in singles)
+        n = len(singles)
+        if n > 1:
+            mean = sum(v for _, _, v in singles) / n
+            s2 = sum((v - mean) ** 2 for _, _, v in singles) / (n - 1)
+        else:
+            s2 = pooled_ss / pooled_df if pooled_df else 0.0
+        variance += weight ** 2 * (1 - n / population) * s2 / n
+
+    half = z * math.sqrt(variance)
+    return Estimate(value, value - half, value + half)
+
+
+def _proportion(parts: List[tuple], z: float) -> Estimate:
+    est = _stratified_estimate(parts, z)
+    return Estimate(est.value, max(0.0, est.low), min(1.0, est.high))
+
+
+def summarize(strata: List[Stratum], results: List[AnalysisResult],
+              confidence: float = 0.95) -> ApproximateStats:
+    """由各层的样本分析结果计算分布估计与置信区间
+
+    没有样本结果的层会被忽略，其余层的权重按总体句数重新归一；
+    被忽略的层数与句数记录在 dropped_strata / dropped_population 中。
+    """
+    z = _z_score(confidence)
+    layers = [(s, r) for s, r in zip(strata, results) if r.gua_results]
+    covered = sum(s.population for s, _ in layers)
+
+    def parts_for(extract):
+        return [(s.population / covered, s.population, [extract(res) for res in r.gua_results])
+                for s, r in layers]
+
+    population = sum(s.population for s in strata)
+    dropped = [s for s, r in zip(strata, results) if s.population and not r.gua_results]
+    dropped_population = sum(s.population for s in dropped)
+    if not layers:
+        empty = Estimate(0.0, 0.0, 0.0)
+        return ApproximateStats(population, 0, confidence, empty, {}, {}, {},
+                                dropped_strata=len(dropped), dropped_population=dropped_population)
+
+    gua_names = sorted({res["gua"] for _, r in layers for res in r.gua_results})
+    polarity_of = {gua: p for p, guas in GUAS.items() for gua in guas}
+    intensity_of = {gua: i for i, guas in INTENSITY_RANK.items() for gua in guas}
+
+    return ApproximateStats(
+        population=population,
+        sample_size=sum(len(r.gua_results) for _, r in layers),
+        confidence=confidence,
+        mean_sentiment=_stratified_estimate(parts_for(lambda res: res["sentiment"]), z),
+        gua={gua: _proportion(parts_for(lambda res: float(res["gua"] == gua)), z)
+             for gua in gua_names},
+        polarity={p: _proportion(parts_for(lambda res: float(polarity_of.get(res["gua"]) == p)), z)
+                  for p in GUAS},
+        intensity={i: _proportion(parts_for(lambda res: float(intensity_of.get(res["gua"]) == i)), z)
+                   for i in INTENSITY_RANK},
+        dropped_strata=len(dropped),
+        dropped_population=dropped_population,
+    )
+
+
+def estimate_corpus(paths: Iterable[Path], analyzer: Optional[YijingAnalyzer] = None,
+                    confidence: float = 0.95, **sample_options) -> ApproximateStats:
+    """抽样并只对样本运行分析器，返回带置信区间的近似统计"""
+    analyzer = analyzer or YijingAnalyzer()
+
+    start = time.perf_counter()
+    strata = sample_corpus(paths, confidence=confidence, **sample_options)
+    scanned = time.perf_counter()
+    results = [analyzer.analyze_sentences(s.sentences) for s in strata]
+    analyzed = time.perf_counter()
+
+    stats = summarize(strata, results, confidence)
+    stats.scan_seconds = scanned - start
+    stats.analysis_seconds = analyzed - scanned
+    return stats
+
+
+def iter_report_lines(stats: ApproximateStats) -> Iterator[str]:
+    """渲染近似统计摘要"""
+    def fmt(est: Estimate) -> str:
+        return f"{est.value:.1%} [{est.low:.1%}, {est.high:.1%}]"
+
+    polarity_cn = {"positive": "积极", "neutral": "中性", "negative": "消极"}
+    intensity_cn = {"high": "高", "medium": "中", "low": "低"}
+
+    yield "近似统计摘要（抽样估计）"
+    yield "=" * 40
+    yield f"📊 总句子数：{stats.population}，样本句子数：{stats.sample_size}"
+    yield f"置信水平：{stats.confidence:.0%}"
+    if stats.dropped_strata:
+        yield (f"⚠ {stats.dropped_strata}个分层没有样本（共{stats.dropped_population}句），"
+               f"未参与估计，其余分层的权重已重新归一")
+    yield (f"⏱ 扫描 {stats.scan_seconds:.2f}s，分析 {stats.analysis_seconds:.2f}s，"
+           f"估计加速比：{stats.speedup:.1f}x")
+    m = stats.mean_sentiment
+    yield f"平均情感值：{m.value:+.3f} [{m.low:+.3f}, {m.high:+.3f}]"
+    yield ""
+    yield "📈 卦象分布："
+    for gua, est in sorted(stats.gua.items(), key=lambda item: -item[1].value):
+        yield f"  - {gua}卦：{fmt(est)}"
+    yield ""
+    yield "📊 极性分布："
+    for polarity, est in stats.polarity.items():
+        yield f"  - {polarity_cn.get(polarity, polarity)}：{fmt(est)}"
+    yield ""
+    yield "📈 强度分布："
+    for intensity, est in stats.intensity.items():
+        yield f"  - {intensity_cn.get(intensity, intensity)}强度：{fmt(est)}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="近似语料统计（抽样估计）")
+    parser.add_argument("-i", "--input", type=Path, nargs="+", required=True)
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--rate", type=float, help="抽样比例，例如 0.01")
+    target.add_argument("--error", type=float, help="比例估计的目标误差，例如 0.01")
+    parser.add_argument("--confidence", type=float, default=0.95)
+    parser.add_argument("--no-stratify", action="store_true", help="不按文件分层")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    stats = estimate_corpus(args.input, confidence=args.confidence, rate=args.rate,
+                            error=args.error, stratify=not args.no_stratify, seed=args.seed)
+    for line in iter_report_lines(stats):
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
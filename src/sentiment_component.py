@@ -0,0 +1,85 @@
+"""yijing 情感-卦象管线组件
+
+把情感打分与卦象映射注册为spaCy管线组件，结果写入扩展属性：
+- Span._.sentiment：句子级情感值，由组件写入并保存在 Doc.user_data 中
+- Doc._.sentiment：整篇文本作为一个整体的情感值，访问时才计算（依赖词性）
+- ._.gua / ._.gua_explanation：由情感值即时映射的卦象（不单独存储）
+
+组件实现了 pipe()，因此 nlp.pipe(..., n_process=N) 时完整的打分工作都在
+各工作进程内完成；句子级结果与重新计算整篇结果所需的词性可随 DocBin
+紧凑序列化。
+"""
+from typing import Iterable, Iterator
+
+from spacy.language import Language
+from spacy.tokens import Doc, DocBin, Span
+from spacy.vocab import Vocab
+
+from sentiment_scoring import calculate_sentiment, map_to_gua
+
+
+def _gua_getter(index: int):
+    def getter(obj):
+        if obj._.sentiment is None:
+            return None
+        return map_to_gua(obj._.sentiment)[index]
+    return getter
+
+
+def _doc_sentiment(doc: Doc) -> float:
+    # 整篇只有一句时直接复用组件写入的句子结果，避免重复打分
+    if doc.has_annotation("SENT_START"):
+        sents = list(doc.sents)
+        if len(sents) == 1 and sents[0]._.sentiment is not None:
+            return sents[0]._.sentiment
+    return calculate_sentiment(doc[:])
+
+
+if not Span.has_extension("sentiment"):
+    Span.set_extension("sentiment", default=None)
+if not Doc.has_extension("sentiment"):
+    Doc.set_extension("sentiment", getter=_doc_sentiment)
+for _cls in (Doc, Span):
+    if not _cls.has_extension("gua"):
+        _cls.set_extension("gua", getter=_gua_getter(0))
+    if not _cls.has_extension("gua_explanation"):
+        _cls.set_extension("gua_explanation", getter=_gua_getter(1))
+
+
+class YijingSentiment:
+    """逐句计算情感值并映射卦象的管线组件（依赖句子切分）"""
+
+    def __init__(self, nlp: Language, name: str = "yijing"):
+        self.name = name
+
+    def __call__(self, doc: Doc) -> Doc:
+        for sent in doc.sents:
+            sent._.sentiment = calculate_sentiment(sent)
+        return doc
+
+    def pipe(self, stream: Iterable[Doc], batch_size: int = 128) -> Iterator[Doc]:
+        # 逐篇打分没有可批量化的计算，batch_size 仅为兼容 nlp.pipe 的调用约定
+        for doc in stream:
+            yield self(doc)
+
+
+@Language.factory("yijing")
+def make_yijing(nlp: Language, name: str) -> YijingSentiment:
+    return YijingSentiment(nlp, name)
+
+
+def docs_to_bytes(docs: Iterable[Doc]) -> bytes:
+    """只保留词形、词性、句子边界和情感值，把分析结果序列化为DocBin
+
+    Doc._.sentiment 在访问时按词性重新计算，因此必须保留 POS，
+    否则恢复后的整篇情感值会变成不带词性的结果。
+    """
+    doc_bin = DocBin(attrs=["ORTH", "POS", "SENT_START"], store_user_data=True)
+    for doc in docs:
+        doc_bin.add(doc)
+    return doc_bin.to_bytes()
+
+
+def docs_from_bytes(data: bytes, vocab: Vocab) -> Iterator[Doc]:
+    """反序列化 docs_to_bytes 的输出，句子级情感值随 user_data 恢复，整篇情感值按词性重算"""
+    return DocBin(store_user_data=True).from_bytes(data).get_docs(vocab)
@@ -0,0 +1,259 @@
+"""句子情感记录的二进制中间格式
+
+由两个文件组成：
+- <base>.s2hr：16字节文件头 + 定长记录（float32极性/强度、int16卦象编码、
+  句子在文本块中的字节偏移与长度）
+- <base>.s2ht：所有句子按UTF-8依次拼接的文本块
+
+两者都可以直接内存映射为NumPy数组，读取数值列时无需解析或拷贝。
+卦象编码为 gua_config.GUA_ORDER 中的下标，-1 表示未映射。
+"""
+import argparse
+from pathlib import Path
+from typing import Dict, Iterator, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from gua_config import GUA_ORDER, gua_code
+from main import load_and_clean_sentences
+
+MAGIC = b"S2HREC"
+FORMAT_VERSION = 1
+RECORD_SUFFIX = ".s2hr"
+TEXT_SUFFIX = ".s2ht"
+
+HEADER_DTYPE = np.dtype([("magic", "S6"), ("version", "<u2"), ("count", "<u8")])
+RECORD_DTYPE = np.dtype([
+    ("offset", "<u8"),        # 句子在文本块中的起始字节
+    ("length", "<u4"),        # 句子的UTF-8字节长度
+    ("sentence_id", "<u4"),
+    ("polarity", "<f4"),
+    ("intensity", "<f4"),
+    ("gua", "<i2"),
+    ("reserved", "V6"),       # 补齐到32字节
+])
+
+
+def _paths(base: Union[str, Path]):
+    base = Path(base)
+    if base.suffix in (RECORD_SUFFIX, TEXT_SUFFIX):
+        base = base.with_suffix("")
+    return base.with_name(base.name + RECORD_SUFFIX), base.with_name(base.name + TEXT_SUFFIX)
+
+
+class RecordWriter:
+    """顺序写入情感记录，关闭时回填文件头中的记录数"""
+
+    def __init__(self, base: Union[str, Path], buffer_size: int = 65536):
+        self.record_path, self.text_path = _paths(base)
+        self._records = open(self.record_path, "wb")
+        self._texts = open(self.text_path, "wb")
+        self._records.write(np.zeros(1, dtype=HEADER_DTYPE).tobytes())
+        self._buffer = np.zeros(buffer_size, dtype=RECORD_DTYPE)
+        self._buffered = 0
+        self._offset = 0
+        self.count = 0
+
+    def append(self, sentence_id: int, text: str, polarity: float, intensity: float,
+               gua: Union[int, str, None] = None) -> None:
+        if isinstance(gua, str):
+            gua = gua_code(gua)
+        encoded = text.encode("utf-8")
+        self._texts.write(encoded)
+
+        self._buffer[self._buffered] = (self._offset, len(encoded), sentence_id, polarity,
+                                        intensity, -1 if gua is None else gua, bytes(6))
+        self._offset += len(encoded)
+        self._buffered += 1
+        self.count += 1
+        if self._buffered == len(self._buffer):
+            self._flush()
+
+    def _flush(self) -> None:
+        self._records.write(self._buffer[:self._buffered].tobytes())
+        self._buffered = 0
+
+    def close(self) -> None:
+        if self._records.closed:
+            return
+        self._flush()
+        header = np.array([(MAGIC, FORMAT_VERSION, self.count)], dtype=HEADER_DTYPE)
+        self._records.seek(0)
+        self._records.write(header.tobytes())
+        self._records.close()
+        self._texts.close()
+
+    def abort(self) -> None:
+        """放弃写入：不回填文件头，并删除两个文件"""
+        if not self._records.closed:
+            self._records.close()
+            self._texts.close()
+        self.record_path.unlink(missing_ok=True)
+        self.text_path.unlink(missing_ok=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        # 出错时文件内容不完整，不能回填有效的文件头
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+class SentimentRecords:
+    """以内存映射方式只读访问情感记录"""
+
+    def __init__(self, base: Union[str, Path]):
+        self.record_path, self.text_path = _paths(base)
+        header = np.fromfile(self.record_path, dtype=HEADER_DTYPE, count=1)
+        if len(header) != 1 or header["magic"][0] != MAGIC:
+            raise ValueError(f"不是有效的情感记录文件：{self.record_path}")
+        if header["version"][0] != FORMAT_VERSION:
+            raise ValueError(f"不支持的记录格式版本：{header['version'][0]}")
+
+        count = int(header["count"][0])
+        # 空文件无法映射，使用空数组代替
+        self.records = (np.memmap(self.record_path, dtype=RECORD_DTYPE, mode="r",
+                                  offset=HEADER_DTYPE.itemsize, shape=(count,))
+                        if count else np.zeros(0, dtype=RECORD_DTYPE))
+        self.blob = (np.memmap(self.text_path, dtype=np.uint8, mode="r")
+                     if self.text_path.stat().st_size else np.zeros(0, dtype=np.uint8))
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    @property
+    def sentence_id(self) -> np.ndarray:
+        return self.records["sentence_id"]
+
+    @property
+    def polarity(self) -> np.ndarray:
+        return self.records["polarity"]
+
+    @property
+    def intensity(self) -> np.ndarray:
+        return self.records["intensity"]
+
+    @property
+    def gua(self) -> np.ndarray:
+        return self.records["gua"]
+
+    def text(self, index: int) -> str:
+        record = self.records[index]
+        start = int(record["offset"])
+        return self.blob[start:start + int(record["length"])].tobytes().decode("utf-8")
+
+    def gua_name(self, index: int) -> Optional[str]:
+        code = int(self.records[index]["gua"])
+        return GUA_ORDER[code] if code >= 0 else None
+
+    def __iter__(self) -> Iterator[Dict]:
+        for idx in range(len(self)):
+            yield {
+                "sentence_id": int(self.sentence_id[idx]),
+                "text": self.text(idx),
+                "polarity": float(self.polarity[idx]),
+                "intensity": float(self.intensity[idx]),
+                "gua": self.gua_name(idx),
+            }
+
+
+def _write_dataframe(df: pd.DataFrame, base: Union[str, Path]) -> int:
+    with RecordWriter(base) as writer:
+        gua_names = df["gua_name"] if "gua_name" in df.columns else [None] * len(df)
+        for row, gua in zip(df.itertuples(index=False), gua_names):
+            writer.append(int(row.sentence_id), str(row.text), float(row.polarity),
+                          float(row.intensity), gua if isinstance(gua, str) else None)
+    return writer.count
+
+
+def from_text_file(src: Union[str, Path], base: Union[str, Path]) -> int:
+    """把 text_s1.txt 布局的文本转换为二进制记录，返回记录数"""
+    return _write_dataframe(load_and_clean_sentences(str(src)), base)
+
+
+def from_csv(src: Union[str, Path], base: Union[str, Path]) -> int:
+    """把 sentiment_gua_mapping_*.csv 转换为二进制记录，返回记录数"""
+    return _write_dataframe(pd.read_csv(src, encoding="utf-8-sig"), base)
+
+
+def _format_float(value: float) -> str:
+    # float32 转回 Python float 后会带出多余的尾数，按6位有效数字输出
+    return f"{value:.6g}"
+
+
+def to_csv(base: Union[str, Path], dst: Union[str, Path],
+           gua_csv: Union[str, Path] = "64_gua.csv") -> None:
+    """把二进制记录导出为 sentiment_gua_mapping 格式的CSV
+
+    若能找到64卦配置文件，则按卦序补全卦象全名与关键词。
+    """
+    records = SentimentRecords(base)
+    full_names = {}
+    if Path(gua_csv).exists():
+        gua_df = pd.read_csv(gua_csv)
+        full_names = {gua_code(name): (name, keywords)
+                      for name, keywords in zip(gua_df["卦名"], gua_df["关键词"])}
+
+    rows = []
+    for idx in range(len(records)):
+        code = int(records.gua[idx])
+        if code < 0:
+            gua_name, gua_keywords = "", ""
+        else:
+            gua_name, gua_keywords = full_names.get(code, (f"{GUA_ORDER[code]}卦", ""))
+        rows.append({
+            "sentence_id": int(records.sentence_id[idx]),
+            "text": records.text(idx),
+            "polarity": _format_float(float(records.polarity[idx])),
+            "intensity": _format_float(float(records.intensity[idx])),
+            "gua_name": gua_name,
+            "gua_keywords": gua_keywords,
+        })
+    pd.DataFrame(rows, columns=["sentence_id", "text", "polarity", "intensity",
+                                "gua_name", "gua_keywords"]).to_csv(
+        dst, index=False, encoding="utf-8-sig")
+
+
+def to_text_file(base: Union[str, Path], dst: Union[str, Path]) -> None:
+    """把二进制记录导出为 text_s1.txt 布局"""
+    records = SentimentRecords(base)
+    with open(dst, "w", encoding="utf-8") as f:
+        for idx in range(len(records)):
+            polarity = float(records.polarity[idx])
+            polarity_type = '积极' if polarity > 0 else '消极' if polarity < 0 else '中性'
+            f.write(f"句子 {int(records.sentence_id[idx])}: {records.text(idx)}"
+                    f"极性：{_format_float(polarity)}（{polarity_type}） "
+                    f"强度：{_format_float(float(records.intensity[idx]))}\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="情感记录二进制格式转换工具")
+    sub = parser.add_subparsers(dest="command", required=True)
+    for command, help_text in [("from-text", "text_s1.txt 布局 -> 二进制记录"),
+                               ("from-csv", "映射CSV -> 二进制记录"),
+                               ("to-text", "二进制记录 -> text_s1.txt 布局"),
+                               ("to-csv", "二进制记录 -> 映射CSV")]:
+        cmd = sub.add_parser(command, help=help_text)
+        cmd.add_argument("src", type=Path)
+        cmd.add_argument("dst", type=Path)
+    sub.choices["to-csv"].add_argument("--gua-csv", type=Path, default=Path("64_gua.csv"))
+    args = parser.parse_args()
+
+    if args.command == "from-text":
+        print(f"已写入{from_text_file(args.src, args.dst)}条记录：{args.dst}")
+    elif args.command == "from-csv":
+        print(f"已写入{from_csv(args.src, args.dst)}条记录：{args.dst}")
+    elif args.command == "to-text":
+        to_text_file(args.src, args.dst)
+        print(f"文件已生成：{args.dst}")
+    else:
+        to_csv(args.src, args.dst, args.gua_csv)
+        print(f"文件已生成：{args.dst}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""情感打分与卦象映射规则
+
+纯规则模块，不依赖分析器或模型：process_text 中的分析器、yijing 管线组件
+和级联分析都从这里取同一套词库、词性权重与卦象区间。
+"""
+import logging
+import math
+from typing import List, Tuple
+
+# 情感词库
+SENTIMENT_LEXICON = {
+    # 基础情感词
+    "好": 0.5, "优秀": 0.7, "糟糕": -0.6,
+    "快乐": 0.6, "悲伤": -0.5, "愤怒": -0.7,
+    "喜悦": 0.8, "焦虑": -0.4, "平静": 0.3,
+    "满意": 0.6, "失望": -0.5, "期待": 0.4,
+    # 扩展情感词
+    "美好": 0.7, "卓越": 0.8, "杰出": 0.8,
+    "欢欣": 0.7, "愉悦": 0.6, "舒畅": 0.5,
+    "忧伤": -0.6, "痛苦": -0.8, "恐惧": -0.7,
+    "烦恼": -0.5, "沮丧": -0.6, "绝望": -0.9,
+    "温暖": 0.4, "温馨": 0.5, "祥和": 0.6,
+    "冷漠": -0.4, "阴郁": -0.5, "压抑": -0.6
+}
+NEGATION_WORDS = {"不", "没", "非", "未", "别", "莫", "勿", "无", "否", "休", "绝", "难", "决", "忌"}
+
+# 非情感词按通用词性（UPOS）计分
+POS_WEIGHTS = {"VERB": 0.3, "ADJ": 0.5, "NOUN": 0.2}
+
+# 卦象区间 (下界, 上界]，按顺序检查（修正坤卦重复问题）
+GUA_INTERVALS = [
+    (0.8, 1.0, ("乾", "天行健，君子以自强不息")),
+    (0.6, 0.8, ("离", "明两作，离，大人以继明照于四方")),
+    (0.4, 0.6, ("巽", "随风巽，君子以申命行事")),
+    (0.2, 0.4, ("艮", "兼山艮，君子以思不出其位")),
+    (0.0, 0.2, ("坤", "地势坤，君子以厚德载物")),
+    (-0.2, 0.0, ("震", "洊雷震，君子以恐惧修省")),
+    (-0.4, -0.2, ("兑", "丽泽兑，君子以朋友讲习")),
+    (-0.6, -0.4, ("坎", "水洊至，习坎，君子以常德行")),
+    (-1.0, -0.6, ("复", "反复其道，七日来复"))  # 修正坤卦为复卦
+]
+DEFAULT_GUA = ("未济", "物不可穷也，故受之以未济终焉")
+
+
+def score_tokens(words: List[str], tags: List[str]) -> float:
+    """根据词序列及其通用词性（UPOS）计算情感值
+
+    与具体分词器无关，完整的spaCy解析和快速分词器共用同一套打分规则。
+    """
+    score = 0.0
+    sent_length = len(words)
+
+    if sent_length == 0:  # 处理空句子
+        return 0.0
+
+    for i, (word, tag) in enumerate(zip(words, tags)):
+        # 情感词库优先
+        if word in SENTIMENT_LEXICON:
+            word_score = SENTIMENT_LEXICON[word]
+            # 检查前三个词是否有否定词
+            negation = any(w in NEGATION_WORDS for w in words[max(0, i - 3):i])
+            score += -word_score if negation else word_score
+        elif tag in POS_WEIGHTS:
+            score += POS_WEIGHTS[tag]
+
+    # 加入句子长度衰减因子
+    return math.tanh(score * math.log(sent_length + 1) / sent_length)
+
+
+def calculate_sentiment(span) -> float:
+    """增强型情感计算（spaCy Span/Doc）"""
+    try:
+        return score_tokens([token.text for token in span], [token.pos_ for token in span])
+    except Exception as e:
+        logging.error(f"情感计算出错：{e}")
+        return 0.0
+
+
+def map_to_gua(score: float) -> Tuple[str, str]:
+    """把情感值映射为 (卦名, 卦辞)"""
+    try:
+        for lower, upper, gua in GUA_INTERVALS:
+            if lower < score <= upper:
+                return gua
+        return DEFAULT_GUA
+    except Exception as e:
+        logging.error(f"卦象映射出错：{e}")
+        return ("未济", "映射出错，默认未济")
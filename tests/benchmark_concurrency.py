@@ -0,0 +1,68 @@
+"""线程池并发分析的扩展性测量
+
+模拟"读取文件（I/O）+ spaCy解析"的混合负载，比较不同线程数下的
+吞吐量与加速比。所有线程共享同一个已加载的模型。
+
+用法：python benchmark_concurrency.py -i demo.txt --copies 32 --workers 1 2 4 8 --io-latency 0.05
+"""
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from process_text import YijingAnalyzer
+
+
+def prepare_corpus(source: Path, copies: int, workdir: Path) -> list:
+    """把样例文本复制成多个文件，作为I/O负载"""
+    text = source.read_text(encoding="utf-8")
+    paths = []
+    for i in range(copies):
+        path = workdir / f"doc_{i:04d}.txt"
+        path.write_text(text, encoding="utf-8")
+        paths.append(path)
+    return paths
+
+
+def run_once(analyzer: YijingAnalyzer, paths: list, workers: int, io_latency: float) -> float:
+    """以指定线程数调用 analyze_files 分析全部文件，返回耗时（秒）"""
+    def _read(path):
+        if io_latency:
+            time.sleep(io_latency)  # 模拟网络存储等慢速I/O
+        return path.read_text(encoding="utf-8")
+
+    start = time.perf_counter()
+    results = analyzer.analyze_files(paths, max_workers=workers, reader=_read)
+    elapsed = time.perf_counter() - start
+    assert len(results) == len(paths)
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="并发分析扩展性测量")
+    parser.add_argument("-i", "--input", type=Path, default=Path("demo.txt"))
+    parser.add_argument("--copies", type=int, default=32)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--io-latency", type=float, default=0.0,
+                        help="每个文件额外模拟的I/O延迟（秒）")
+    args = parser.parse_args()
+
+    analyzer = YijingAnalyzer()
+    # 预热：首次调用会触发词表等惰性初始化
+    analyzer.analyze(args.input.read_text(encoding="utf-8"))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = prepare_corpus(args.input, args.copies, Path(tmp))
+        baseline = None
+        print("线程数 | 耗时(s) | 文件/秒 | 加速比")
+        for workers in args.workers:
+            elapsed = run_once(analyzer, paths, workers, args.io_latency)
+            baseline = baseline or elapsed
+            print(f"{workers:6d} | {elapsed:7.2f} | {len(paths) / elapsed:7.1f} | {baseline / elapsed:5.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+import spacy
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+import sentiment_component  # noqa: F401  注册 yijing 组件
+from process_text import YijingAnalyzer
+
+
+class TestAnalyzerConcurrency(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        # 用空白中文管线代替大模型，所有实例共享这一个模型
+        cls._saved_nlp = YijingAnalyzer.__dict__.get("_nlp")
+        nlp = spacy.blank("zh")
+        nlp.add_pipe("sentencizer")
+        nlp.add_pipe("yijing", name="sentiment")
+        YijingAnalyzer._nlp = nlp
+
+    @classmethod
+    def tearDownClass(cls):
+        if cls._saved_nlp is None:
+            del YijingAnalyzer._nlp
+        else:
+            YijingAnalyzer._nlp = cls._saved_nlp
+
+    def setUp(self):
+        self.analyzer = YijingAnalyzer()
+        self.texts = [f"第{i}句很好。" * (i % 3 + 1) + ("我不快乐！" if i % 2 else "") for i in range(20)]
+
+    def test_analyze_keeps_no_state(self):
+        first = self.analyzer.analyze(self.texts[0])
+        second = self.analyzer.analyze(self.texts[1])
+        self.assertEqual(len(first.sentences), 1)
+        self.assertEqual(len(second.sentences), 3)
+        self.assertEqual(self.analyzer.analyze(self.texts[0]).gua_results, first.gua_results)
+        self.assertEqual(self.analyzer.gua_results, [])
+
+    def test_analyze_batch_matches_sequential_order(self):
+        expected = [self.analyzer.analyze(text).gua_results for text in self.texts]
+        batched = self.analyzer.analyze_batch(self.texts, max_workers=8)
+        self.assertEqual([r.gua_results for r in batched], expected)
+
+    def test_analyze_files_matches_sequential_order(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            paths = []
+            for i, text in enumerate(self.texts):
+                path = Path(tmp) / f"{i}.txt"
+                path.write_text(text, encoding="utf-8")
+                paths.append(path)
+            results = self.analyzer.analyze_files(paths, max_workers=4)
+        self.assertEqual([r.sentences for r in results],
+                         [self.analyzer.analyze(text).sentences for text in self.texts])
+
+
+if __name__ == '__main__':
+    unittest.main()
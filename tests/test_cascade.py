@@ -0,0 +1,88 @@
+import sys
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import spacy
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+import sentiment_component  # noqa: F401  注册 yijing 组件
+import cascade
+from cascade import CascadeAnalyzer, CascadeStats
+from process_text import YijingAnalyzer
+from sentiment_scoring import POS_WEIGHTS, map_to_gua, score_tokens
+
+
+class TestCascade(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        # 第二级使用空白中文管线，无需加载大模型
+        cls._saved_nlp = YijingAnalyzer.__dict__.get("_nlp")
+        nlp = spacy.blank("zh")
+        nlp.add_pipe("sentencizer")
+        nlp.add_pipe("yijing", name="sentiment")
+        YijingAnalyzer._nlp = nlp
+
+    @classmethod
+    def tearDownClass(cls):
+        if cls._saved_nlp is None:
+            del YijingAnalyzer._nlp
+        else:
+            YijingAnalyzer._nlp = cls._saved_nlp
+
+    def setUp(self):
+        self.cascade = CascadeAnalyzer()
+
+    def test_lexicon_gate(self):
+        # 含情感词的句子在任何模式下都交给完整解析
+        self.assertIsNone(self.cascade.fast_score("今天很好。"))
+        self.assertIsNone(CascadeAnalyzer(margin=1.0).fast_score("今天很好。"))
+
+    def test_strict_mode_uses_bounds(self):
+        # 严格模式的前提：全部不计分落在震卦，任一实词按任何词性计分都会离开震卦
+        for tag in POS_WEIGHTS:
+            self.assertNotEqual(map_to_gua(0.0), map_to_gua(score_tokens(["字"] * 50, [tag] + ["X"] * 49)))
+        with mock.patch.object(cascade.pseg, "lcut") as lcut:
+            self.assertEqual(self.cascade.fast_score("……"), 0.0)
+            self.assertIsNone(self.cascade.fast_score("北京大学"))
+        lcut.assert_not_called()
+
+    def test_approximate_mode_uses_margin(self):
+        self.assertIsNotNone(CascadeAnalyzer(margin=0.05).fast_score("北京大学"))
+        self.assertIsNone(CascadeAnalyzer(margin=0.5).fast_score("北京大学"))
+
+    def test_routing_and_stats(self):
+        self.assertEqual(CascadeStats().ratios(), {"fast": 0.0, "full": 0.0})
+
+        result = self.cascade.analyze("今天很好。\n——\n我不快乐！")
+        self.assertEqual(len(result.sentences), 3)
+        self.assertEqual(self.cascade.stats.fast, 1)
+        self.assertEqual(self.cascade.stats.full, 2)
+        self.assertAlmostEqual(self.cascade.stats.ratios()["fast"], 1 / 3)
+        self.assertAlmostEqual(self.cascade.stats.ratios()["full"], 2 / 3)
+        self.assertGreater(self.cascade.stats.seconds_per_sentence()["full"], 0)
+
+        reference = YijingAnalyzer().analyze_sentences(["今天很好。", "我不快乐！"])
+        full = [r for r in result.gua_results if r["sentence"] != "——"]
+        self.assertEqual([r["gua"] for r in full], [r["gua"] for r in reference.gua_results])
+
+    def test_evaluate_against_analyze(self):
+        report = self.cascade.evaluate(["今天很好。我不快乐！", "平静。"])
+        self.assertEqual(report["sentences"], 3)
+        self.assertEqual(report["segmentation_agreement"], 1.0)
+        self.assertEqual(report["overall_agreement"], 1.0)
+        self.assertEqual(report["distribution_distance"], 0.0)
+        self.assertGreater(report["reference_seconds"], 0)
+        self.assertGreater(report["speedup"], 0)
+        # evaluate 不计入运行统计
+        self.assertEqual(self.cascade.stats.total, 0)
+
+    def test_calibrate_falls_back_to_strict(self):
+        report = self.cascade.calibrate(["今天很好。", "平静。"], margins=(0.05,))
+        self.assertIsNone(report["margin"])
+        self.assertIsNone(self.cascade.margin)
+
+
+if __name__ == '__main__':
+    unittest.main()
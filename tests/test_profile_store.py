@@ -0,0 +1,110 @@
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from gua_config import gua_code
+from process_text import AnalysisResult
+from profile_store import PROFILE_DIM, ProfileStore, profile_vector
+
+
+class TestProfileStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.rng = np.random.default_rng(0)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_profile_vector_histogram(self):
+        result = AnalysisResult()
+        result.add("好。", 0.5, "巽", "")
+        result.add("坏。", -0.1, "震", "")
+        vector = profile_vector(result)
+        self.assertEqual(vector.shape, (PROFILE_DIM,))
+        self.assertAlmostEqual(vector[gua_code("巽")], 0.5)
+        self.assertAlmostEqual(vector[gua_code("震卦（䷲）")], 0.5)
+        self.assertAlmostEqual(float(vector[-1]), 0.2, places=6)
+
+    def test_query_matches_brute_force(self):
+        store = ProfileStore(self.tmp.name)
+        vectors = self.rng.random((500, PROFILE_DIM), dtype=np.float32)
+        store.extend((f"doc{i}", v) for i, v in enumerate(vectors))
+        query = vectors[42]
+
+        hits = store.query(query, k=5, chunk_size=64)
+        self.assertEqual(hits[0][0], "doc42")
+        cosine = vectors @ query / (np.linalg.norm(vectors, axis=1) * np.linalg.norm(query))
+        expected = [f"doc{i}" for i in np.argsort(-cosine)[:5]]
+        self.assertEqual([doc_id for doc_id, _ in hits], expected)
+
+        hits = store.query(query, k=3, metric="euclidean", chunk_size=64, exclude="doc42")
+        distance = np.linalg.norm(vectors - query, axis=1)
+        expected = [f"doc{i}" for i in np.argsort(distance)[1:4]]
+        self.assertEqual([doc_id for doc_id, _ in hits], expected)
+
+    def test_incremental_append_and_reopen(self):
+        store = ProfileStore(self.tmp.name)
+        store.append("a", np.ones(PROFILE_DIM, dtype=np.float32))
+        self.assertEqual(len(store.vectors()), 1)
+        store.append("b", np.zeros(PROFILE_DIM, dtype=np.float32))
+
+        # 模拟中断写入：多出半截向量
+        with open(Path(self.tmp.name) / ProfileStore.VECTOR_FILE, "ab") as f:
+            f.write(b"\x00" * 8)
+        reopened = ProfileStore(self.tmp.name)
+        self.assertEqual(reopened.doc_ids, ["a", "b"])
+        self.assertEqual(reopened.vectors().shape, (2, PROFILE_DIM))
+        self.assertEqual(reopened.query(np.ones(PROFILE_DIM), k=1)[0][0], "a")
+
+    def test_torn_id_write_is_dropped(self):
+        store = ProfileStore(self.tmp.name)
+        store.append("a", np.ones(PROFILE_DIM, dtype=np.float32))
+
+        # 模拟中断写入：向量已写完，ID只写了半行
+        with open(Path(self.tmp.name) / ProfileStore.VECTOR_FILE, "ab") as f:
+            f.write(np.zeros(PROFILE_DIM, dtype=np.float32).tobytes())
+        with open(Path(self.tmp.name) / ProfileStore.ID_FILE, "a", encoding="utf-8") as f:
+            f.write("b")
+        reopened = ProfileStore(self.tmp.name)
+        self.assertEqual(reopened.doc_ids, ["a"])
+        reopened.append("c", np.full(PROFILE_DIM, 2, dtype=np.float32))
+
+        reopened = ProfileStore(self.tmp.name)
+        self.assertEqual(reopened.doc_ids, ["a", "c"])
+        np.testing.assert_array_equal(reopened.vectors()[:, 0], [1, 2])
+
+    def test_ids_without_vectors_are_dropped(self):
+        store = ProfileStore(self.tmp.name)
+        store.extend([("a", np.ones(PROFILE_DIM)), ("b", np.zeros(PROFILE_DIM))])
+        with open(Path(self.tmp.name) / ProfileStore.VECTOR_FILE, "r+b") as f:
+            f.truncate(store._row_bytes + 8)
+        reopened = ProfileStore(self.tmp.name)
+        self.assertEqual(reopened.doc_ids, ["a"])
+        self.assertEqual(reopened.vectors().shape, (1, PROFILE_DIM))
+        self.assertEqual((Path(self.tmp.name) / ProfileStore.ID_FILE).read_text(encoding="utf-8"), "a\n")
+
+    def test_rejects_bad_dimension(self):
+        store = ProfileStore(self.tmp.name)
+        with self.assertRaises(ValueError):
+            store.append("x", np.ones(3))
+
+    def test_id_file_uses_lf_line_endings(self):
+        store = ProfileStore(self.tmp.name)
+        store.extend([("a", np.ones(PROFILE_DIM)), ("文档b", np.zeros(PROFILE_DIM))])
+        self.assertEqual((Path(self.tmp.name) / ProfileStore.ID_FILE).read_bytes(),
+                         "a\n文档b\n".encode("utf-8"))
+        reopened = ProfileStore(self.tmp.name)
+        self.assertEqual(reopened.doc_ids, ["a", "文档b"])
+        self.assertEqual(reopened.query(np.ones(PROFILE_DIM), k=1, exclude="a")[0][0], "文档b")
+        for bad in ("x\ny", "x\ry"):
+            with self.assertRaises(ValueError):
+                store.append(bad, np.ones(PROFILE_DIM))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+import io
+import sys
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from process_text import AnalysisResult, ReportGenerator
+
+
+class TestReportGenerator(unittest.TestCase):
+    def setUp(self):
+        self.result = AnalysisResult()
+        for i in range(10):
+            gua = "乾" if i % 2 else "坤"
+            self.result.add(f"句子{i}。", 0.1 * i, gua, f"{gua}卦辞")
+
+    def detail_rows(self, lines):
+        return [line for line in lines if line[:4].isdigit()]
+
+    def test_iter_sections_in_order(self):
+        names = [name for name, _ in ReportGenerator(self.result).iter_sections()]
+        self.assertEqual(names, list(ReportGenerator.SECTIONS))
+
+    def test_section_selection(self):
+        lines = ReportGenerator(self.result).generate(["statistics"])
+        self.assertEqual(lines[0], "统计摘要")
+        self.assertIn("📊 总句子数：10", lines)
+        self.assertNotIn("句子-卦象映射明细", lines)
+        with self.assertRaises(ValueError):
+            ReportGenerator(self.result).generate(["unknown"])
+
+    def test_sections_render_lazily(self):
+        generator = ReportGenerator(self.result)
+        name, lines = next(generator.iter_sections(["detail"]))
+        self.assertEqual(name, "detail")
+        self.assertEqual(next(lines), "句子-卦象映射明细")
+
+    def test_detail_paging(self):
+        generator = ReportGenerator(self.result, detail_offset=3, detail_limit=2)
+        rows = self.detail_rows(generator.iter_lines(["detail"]))
+        self.assertEqual([row[:4] for row in rows], ["0004", "0005"])
+
+        generator = ReportGenerator(self.result, detail_offset=8)
+        self.assertEqual(len(self.detail_rows(generator.iter_lines(["detail"]))), 2)
+
+    def test_rejects_negative_paging(self):
+        with self.assertRaises(ValueError):
+            ReportGenerator(self.result, detail_offset=-1)
+        with self.assertRaises(ValueError):
+            ReportGenerator(self.result, detail_limit=-1)
+
+    def test_write_matches_generate(self):
+        generator = ReportGenerator(self.result)
+        stream = io.StringIO()
+        count = generator.write(stream, ["statistics", "detail"])
+        lines = generator.generate(["statistics", "detail"])
+        self.assertEqual(count, len(lines))
+        self.assertEqual(stream.getvalue(), "\n".join(lines) + "\n")
+
+
+if __name__ == '__main__':
+    unittest.main()
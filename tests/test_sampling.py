@@ -0,0 +1,121 @@
+import math
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from statistics import NormalDist
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+import sampling
+from process_text import AnalysisResult
+from sampling import Stratum, iter_report_lines, sample_corpus, sample_size_for_error, summarize
+
+
+class TestSampling(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.paths = []
+        for name, count in [("a.txt", 300), ("b.txt", 100)]:
+            path = Path(self.tmp.name) / name
+            path.write_text("".join(f"{name}句子{i}。\n" for i in range(count)), encoding="utf-8")
+            self.paths.append(path)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_sample_size_for_error(self):
+        self.assertEqual(sample_size_for_error(0.05), 385)
+        self.assertLess(sample_size_for_error(0.05, population=400), 385)
+        with self.assertRaises(ValueError):
+            sample_size_for_error(0)
+
+    def test_requires_exactly_one_target(self):
+        with self.assertRaises(ValueError):
+            sample_corpus(self.paths)
+        with self.assertRaises(ValueError):
+            sample_corpus(self.paths, rate=0.1, error=0.1)
+
+    def test_error_target_allocates_proportionally(self):
+        strata = sample_corpus(self.paths, error=0.1, seed=0)
+        self.assertEqual([s.population for s in strata], [300, 100])
+        sizes = [len(s.sentences) for s in strata]
+        self.assertGreater(sizes[0], sizes[1])
+        self.assertTrue(all(s.startswith("a.txt") for s in strata[0].sentences))
+
+    def test_error_target_respects_global_budget(self):
+        paths = []
+        for i in range(40):
+            path = Path(self.tmp.name) / f"small{i}.txt"
+            path.write_text("".join(f"句子{j}。\n" for j in range(50)), encoding="utf-8")
+            paths.append(path)
+        budget = sample_size_for_error(0.05, 0.95, population=2000) + len(paths)
+
+        # 每层蓄水池的容量按全局样本量分配，而不是无限总体下的385句
+        with mock.patch.object(sampling, "_reservoir", wraps=sampling._reservoir) as reservoir:
+            strata = sample_corpus(paths, error=0.05, seed=0)
+        capacities = [call.args[1] for call in reservoir.call_args_list]
+        self.assertLessEqual(sum(capacities), budget)
+        self.assertTrue(all(capacity < 50 for capacity in capacities))
+        self.assertEqual([len(s.sentences) for s in strata], capacities)
+        self.assertEqual(sum(s.population for s in strata), 2000)
+
+    def test_unstratified_rate_sample(self):
+        strata = sample_corpus(self.paths, rate=1.0, stratify=False, seed=0)
+        self.assertEqual(len(strata), 1)
+        self.assertEqual(strata[0].population, 400)
+        self.assertEqual(len(strata[0].sentences), 400)
+
+    def test_summarize_census_has_exact_interval(self):
+        result = AnalysisResult()
+        result.add("好。", 0.5, "巽", "")
+        result.add("坏。", -0.1, "震", "")
+        stats = summarize([Stratum("all", population=2)], [result])
+        self.assertAlmostEqual(stats.gua["巽"].value, 0.5)
+        self.assertAlmostEqual(stats.gua["巽"].low, 0.5)
+        self.assertAlmostEqual(stats.mean_sentiment.value, 0.2)
+        self.assertEqual(stats.sample_size, 2)
+
+    def test_single_sample_strata_have_nonzero_interval(self):
+        strata, results = [], []
+        for i in range(200):
+            result = AnalysisResult()
+            result.add("句。", 0.5, "巽" if i % 2 else "震", "")
+            strata.append(Stratum(f"s{i}", population=100))
+            results.append(result)
+        est = summarize(strata, results).gua["巽"]
+        self.assertAlmostEqual(est.value, 0.5)
+        # 200个独立样本、p=0.5 时半宽约为 1.96 * sqrt(0.25 / 200) ≈ 0.069
+        self.assertAlmostEqual(est.high - est.low, 2 * 0.069, delta=0.01)
+
+    def test_lone_single_sample_stratum_uses_pooled_variance(self):
+        big, single = AnalysisResult(), AnalysisResult()
+        for i in range(10):
+            big.add("句。", float(i % 2), "巽", "")
+        single.add("句。", 1.0, "巽", "")
+        est = summarize([Stratum("big", population=1000), Stratum("single", population=1000)],
+                        [big, single]).mean_sentiment
+        s2 = 2.5 / 9  # big 层的样本方差
+        variance = 0.25 * (1 - 10 / 1000) * s2 / 10 + 0.25 * (1 - 1 / 1000) * s2
+        self.assertAlmostEqual(est.high - est.value, NormalDist().inv_cdf(0.975) * math.sqrt(variance))
+
+    def test_rate_sample_keeps_every_nonempty_stratum(self):
+        empty = Path(self.tmp.name) / "empty.txt"
+        empty.write_text("", encoding="utf-8")
+        strata = sample_corpus(self.paths + [empty], rate=1e-9, seed=0)
+        self.assertEqual([len(s.sentences) for s in strata], [1, 1, 0])
+        self.assertTrue(strata[1].sentences[0].startswith("b.txt"))
+
+    def test_summarize_reports_dropped_strata(self):
+        result = AnalysisResult()
+        result.add("好。", 0.5, "巽", "")
+        strata = [Stratum("a", population=3), Stratum("b", population=7), Stratum("c")]
+        stats = summarize(strata, [result, AnalysisResult(), AnalysisResult()])
+        self.assertEqual((stats.dropped_strata, stats.dropped_population), (1, 7))
+        self.assertAlmostEqual(stats.gua["巽"].value, 1.0)
+        self.assertTrue(any("7句" in line for line in iter_report_lines(stats)))
+
+
+if __name__ == '__main__':
+    unittest.main()
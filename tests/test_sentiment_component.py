@@ -0,0 +1,63 @@
+import sys
+import unittest
+from pathlib import Path
+
+import spacy
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from process_text import YijingAnalyzer
+from sentiment_component import docs_from_bytes, docs_to_bytes
+
+
+class TestSentimentComponent(unittest.TestCase):
+    def setUp(self):
+        # 按字切分的空白中文管线即可覆盖组件逻辑，无需加载大模型
+        self.nlp = spacy.blank("zh")
+        self.nlp.add_pipe("sentencizer")
+        self.nlp.add_pipe("yijing", name="sentiment")
+        self.texts = ["今天很好。我不好！", "平静。"]
+
+    def test_sentence_extensions(self):
+        doc = self.nlp(self.texts[0])
+        sents = list(doc.sents)
+        self.assertEqual(len(sents), 2)
+        self.assertGreater(sents[0]._.sentiment, 0)
+        self.assertLess(sents[1]._.sentiment, 0)
+        self.assertEqual(sents[1]._.gua, YijingAnalyzer._map_to_gua(sents[1]._.sentiment)[0])
+        self.assertIsNotNone(doc._.sentiment)
+
+    def test_doc_sentiment_is_computed_on_access(self):
+        doc = self.nlp(self.texts[0])
+        stored = [key[1] for key in doc.user_data if key[0] == "._."]
+        self.assertEqual(stored, ["sentiment", "sentiment"])  # 仅句子级结果被存储
+        self.assertEqual(doc._.sentiment, YijingAnalyzer._calculate_sentiment(doc[:]))
+        single = self.nlp(self.texts[1])
+        self.assertEqual(single._.sentiment, list(single.sents)[0]._.sentiment)
+
+    def test_pipe_matches_call(self):
+        piped = [YijingAnalyzer.result_from_doc(doc) for doc in self.nlp.pipe(self.texts, batch_size=1)]
+        called = [YijingAnalyzer.result_from_doc(self.nlp(text)) for text in self.texts]
+        self.assertEqual([r.gua_results for r in piped], [r.gua_results for r in called])
+
+    def test_docbin_roundtrip(self):
+        docs = list(self.nlp.pipe(self.texts))
+        restored = YijingAnalyzer.results_from_bytes(docs_to_bytes(docs), self.nlp.vocab)
+        expected = [YijingAnalyzer.result_from_doc(doc) for doc in docs]
+        self.assertEqual([r.gua_results for r in restored], [r.gua_results for r in expected])
+
+    def test_docbin_roundtrip_keeps_pos(self):
+        # 用属性规则给每个字标注形容词，覆盖依赖词性的整篇情感值
+        nlp = spacy.blank("zh")
+        nlp.add_pipe("sentencizer")
+        nlp.add_pipe("attribute_ruler").add(patterns=[[{"IS_PUNCT": False}]], attrs={"POS": "ADJ"})
+        nlp.add_pipe("yijing", name="sentiment")
+        docs = list(nlp.pipe(["天空很蓝。大海很深。", "平安。"]))
+        restored = list(docs_from_bytes(docs_to_bytes(docs), nlp.vocab))
+        self.assertGreater(docs[0]._.sentiment, 0)
+        self.assertEqual([doc._.sentiment for doc in restored], [doc._.sentiment for doc in docs])
+        self.assertEqual([doc._.gua for doc in restored], [doc._.gua for doc in docs])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+
+from main import load_and_clean_sentences
+from sentiment_records import (RecordWriter, SentimentRecords, from_csv, from_text_file,
+                               to_csv, to_text_file)
+
+
+class TestSentimentRecords(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.base = Path(self.tmp.name) / "records"
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_write_and_memory_map(self):
+        with RecordWriter(self.base, buffer_size=2) as writer:
+            writer.append(1, "你好。", 0.5, 0.25, "巽")
+            writer.append(2, "", -0.1, 0.75, "渐卦（䷴）")
+            writer.append(3, "未映射", 0.0, 0.0)
+
+        records = SentimentRecords(self.base)
+        self.assertEqual(len(records), 3)
+        self.assertIsInstance(records.polarity, np.memmap)
+        np.testing.assert_allclose(records.intensity, [0.25, 0.75, 0.0])
+        self.assertEqual([records.text(i) for i in range(3)], ["你好。", "", "未映射"])
+        self.assertEqual([row["gua"] for row in records], ["巽", "渐", None])
+
+    def test_empty_file(self):
+        RecordWriter(self.base).close()
+        self.assertEqual(len(SentimentRecords(self.base)), 0)
+
+    def test_failed_write_leaves_no_records(self):
+        with self.assertRaises(RuntimeError):
+            with RecordWriter(self.base, buffer_size=1) as writer:
+                writer.append(1, "你好。", 0.5, 0.25, "巽")
+                writer.append(2, "再见。", 0.1, 0.5, "坤")
+                raise RuntimeError("中断")
+        self.assertFalse(writer.record_path.exists())
+        self.assertFalse(writer.text_path.exists())
+
+    def test_unfinished_writer_is_not_readable(self):
+        writer = RecordWriter(self.base, buffer_size=1)
+        writer.append(1, "你好。", 0.5, 0.25, "巽")
+        writer._records.flush()
+        with self.assertRaises(ValueError):
+            SentimentRecords(self.base)
+        writer.abort()
+
+    def test_csv_roundtrip(self):
+        src = ROOT / "data" / "sentiment_gua_mapping_20250407.csv"
+        dst = Path(self.tmp.name) / "out.csv"
+        count = from_csv(src, self.base)
+        to_csv(self.base, dst, gua_csv=ROOT / "data" / "64_gua.csv")
+
+        original = pd.read_csv(src, encoding="utf-8-sig")
+        restored = pd.read_csv(dst, encoding="utf-8-sig")
+        self.assertEqual(count, len(original))
+        pd.testing.assert_frame_equal(original, restored)
+
+    def test_text_roundtrip(self):
+        src = ROOT / "tests" / "text_s1.txt"
+        dst = Path(self.tmp.name) / "out.txt"
+        from_text_file(src, self.base)
+        to_text_file(self.base, dst)
+        pd.testing.assert_frame_equal(load_and_clean_sentences(str(src)),
+                                      load_and_clean_sentences(str(dst)))
+
+
+if __name__ == '__main__':
+    unittest.main()